@@ -0,0 +1,237 @@
+# Search item Bloom filter over known barcodes and item codes
+import hashlib
+import math
+import pickle
+import re
+import time
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+from searchitem.api.trace import trace
+
+BITS_KEY = "searchitem_bloom_bits"
+META_KEY = "searchitem_bloom_meta"
+REBUILD_FLAG_KEY = "searchitem_bloom_rebuild_queued"
+# Target false positive rate used to size the filter
+FALSE_POSITIVE_RATE = 0.01
+# Extra room for codes added by hooks between rebuilds
+GROWTH_FACTOR = 1.5
+# Default lengths of scanner-shaped inputs (EAN-8, UPC-A, EAN-13, GTIN-14)
+DEFAULT_SCANNER_LENGTHS = (8, 12, 13, 14)
+# Seconds a replaced bitmap keeps receiving adds, for callers that read the
+# metadata just before the swap
+PREVIOUS_GRACE_SECONDS = 300
+# Codes saved this long before a rebuild started are replayed after the
+# swap, covering transactions that committed while it was being built
+REPLAY_MARGIN_SECONDS = 600
+
+
+def is_enabled():
+    return bool(frappe.conf.get("searchitem_bloom_filter"))
+
+
+def skips_substring_tiers():
+    """Whether unknown scanner-shaped inputs also skip the LIKE tiers"""
+    return bool(frappe.conf.get("searchitem_bloom_skip_substring"))
+
+
+def is_scanner_shaped(query):
+    lengths = frappe.conf.get("searchitem_scanner_lengths") or DEFAULT_SCANNER_LENGTHS
+    return bool(re.fullmatch(r"\d+", query or "")) and len(query) in lengths
+
+
+def filter_parameters(count):
+    """Return (bits, hashes) for `count` entries at FALSE_POSITIVE_RATE"""
+    count = max(int(count * GROWTH_FACTOR), 1024)
+    bits = int(-count * math.log(FALSE_POSITIVE_RATE) / (math.log(2) ** 2))
+    hashes = max(1, round(bits / count * math.log(2)))
+    return bits, hashes
+
+
+def bit_positions(value, bits, hashes):
+    """Double hashing positions for a casefolded value"""
+    digest = hashlib.blake2b(value.casefold().encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def _bits_key(cache, generation):
+    return cache.make_key(f"{BITS_KEY}|{generation}")
+
+
+def _get_meta():
+    """
+    Current `{generation, bits, hashes, previous}`. Never cached in the
+    worker: the sizing only holds for the bitmap of the same generation.
+    """
+    cache = frappe.cache()
+    raw = cache.get(cache.make_key(META_KEY))
+    meta = pickle.loads(raw) if raw else None
+    return meta if meta and meta.get("generation") else None
+
+
+def might_contain(value):
+    """
+    Return False only when `value` is certainly not a known barcode or item
+    code; None when the filter is not available yet
+    """
+    meta = _get_meta()
+    if not meta:
+        queue_rebuild()
+        return None
+
+    cache = frappe.cache()
+    key = _bits_key(cache, meta["generation"])
+    pipeline = cache.pipeline()
+    for position in bit_positions(value, meta["bits"], meta["hashes"]):
+        pipeline.getbit(key, position)
+    return all(pipeline.execute())
+
+
+def add(values):
+    """
+    Add values to the live filter, and to the bitmap it replaced while
+    that one may still be probed
+    """
+    values = [value for value in values if value]
+    meta = _get_meta()
+    if not values or not meta:
+        return
+
+    cache = frappe.cache()
+    pipeline = cache.pipeline()
+    filters = [(meta, None)]
+    previous = meta.get("previous")
+    if previous:
+        remaining = int(previous["expires"] - time.time())
+        if remaining > 0:
+            filters.append((previous, remaining))
+
+    for target, expires_in in filters:
+        key = _bits_key(cache, target["generation"])
+        for value in values:
+            for position in bit_positions(value, target["bits"], target["hashes"]):
+                pipeline.setbit(key, position, 1)
+        if expires_in:
+            # SETBIT recreates a key that just expired; expire it again
+            pipeline.expire(key, expires_in)
+    pipeline.execute()
+
+
+def add_after_commit(values):
+    """Add values once the saving transaction commits, see `rebuild_filter`"""
+
+    def publish():
+        try:
+            add(values)
+        except Exception as e:
+            frappe.log_error(f"Searchitem Bloom Filter Error: {str(e)}", "Searchitem API")
+
+    frappe.db.after_commit.add(publish)
+
+
+def _iter_known_codes(modified_since=None):
+    condition = "where modified >= %(since)s" if modified_since else ""
+    for (name,) in frappe.db.sql(
+        f"select name from `tabItem` {condition}", {"since": modified_since}
+    ):
+        yield name
+    for (barcode,) in frappe.db.sql(
+        f"""select barcode from `tabItem Barcode`
+        where parenttype = 'Item' {"and modified >= %(since)s" if modified_since else ""}""",
+        {"since": modified_since},
+    ):
+        yield barcode
+
+
+def rebuild_filter():
+    """
+    Rebuild the filter from scratch so removed codes drop out, then swap
+    it in and replay codes saved while it was being built.
+
+    Each rebuild writes a new generation, so its size can change freely:
+    probes always use the bits and hashes of the generation they read.
+    Hooks add codes after their transaction commits, so a code either is
+    visible to the replay (which runs in a fresh snapshot after the swap)
+    or is added by a hook that already sees the new generation.
+    """
+    started = add_to_date(now_datetime(), seconds=-REPLAY_MARGIN_SECONDS)
+    count = frappe.db.count("Item") + frappe.db.count("Item Barcode", {"parenttype": "Item"})
+    bits, hashes = filter_parameters(count)
+
+    buffer = bytearray((bits + 7) // 8)
+    for value in _iter_known_codes():
+        for position in bit_positions(value, bits, hashes):
+            # Redis bit offsets count from the most significant bit of each byte
+            buffer[position >> 3] |= 0x80 >> (position & 7)
+
+    cache = frappe.cache()
+    current = _get_meta()
+    meta = {"generation": frappe.generate_hash(length=10), "bits": bits, "hashes": hashes, "previous": None}
+    pipeline = cache.pipeline()
+    pipeline.set(_bits_key(cache, meta["generation"]), bytes(buffer))
+    if current:
+        current.pop("previous", None)
+        meta["previous"] = {**current, "expires": time.time() + PREVIOUS_GRACE_SECONDS}
+        pipeline.expire(_bits_key(cache, current["generation"]), PREVIOUS_GRACE_SECONDS)
+    pipeline.set(cache.make_key(META_KEY), pickle.dumps(meta))
+    pipeline.execute()
+
+    cache.delete_value(REBUILD_FLAG_KEY)
+
+    # End the snapshot the build read from, so the replay sees every
+    # transaction committed until now
+    frappe.db.commit()
+    add(list(_iter_known_codes(modified_since=started)))
+
+
+def queue_rebuild():
+    """Enqueue a background rebuild unless one is already queued"""
+    cache = frappe.cache()
+    if cache.get_value(REBUILD_FLAG_KEY):
+        return
+    cache.set_value(REBUILD_FLAG_KEY, 1, expires_in_sec=3600)
+    frappe.enqueue("searchitem.api.bloom.rebuild_filter", queue="long", job_id="searchitem_bloom_rebuild")
+
+
+def scheduled_rebuild():
+    """Daily scheduler entry point"""
+    if is_enabled():
+        rebuild_filter()
+
+
+def on_item_change(doc, method=None, *args, **kwargs):
+    """doc_events handler adding saved item codes and barcodes to the filter"""
+    try:
+        if is_enabled():
+            add_after_commit(
+                [doc.name, doc.get("item_code")] + [row.barcode for row in doc.get("barcodes") or []]
+            )
+    except Exception as e:
+        frappe.log_error(f"Searchitem Bloom Filter Error: {str(e)}", "Searchitem API")
+
+
+def on_item_barcode_change(doc, method=None, *args, **kwargs):
+    """doc_events handler adding directly saved barcodes to the filter"""
+    try:
+        if is_enabled():
+            add_after_commit([doc.barcode])
+    except Exception as e:
+        frappe.log_error(f"Searchitem Bloom Filter Error: {str(e)}", "Searchitem API")
+
+
+def is_unknown_scan(query):
+    """
+    True when `query` looks like a scanned barcode and the filter proves it
+    is neither a barcode nor an item code
+    """
+    if not is_enabled() or not is_scanner_shaped(query):
+        return False
+
+    try:
+        return might_contain(query) is False
+    except Exception as e:
+        trace("bloom.error", query=query, error=e)
+        return False
@@ -0,0 +1,50 @@
+# Search item page bootstrap data
+import frappe
+
+from searchitem.api.catalog import get_current_watermark
+from searchitem.api.permission import get_permission_snapshot
+from searchitem.api.pricing import apply_prices, get_price_list
+from searchitem.api.products import resolve_image_urls
+from searchitem.searchitem import get_searchitem_products
+
+FEATURED_KEY = "searchitem_featured_products"
+FEATURED_TTL = 300
+
+# Placeholder in the cached page shell replaced by the per-user blob
+BOOTSTRAP_PLACEHOLDER = "<!-- searchitem_bootstrap -->"
+
+
+def get_featured_products():
+    """
+    Featured items with image URLs resolved, shared by every user of the
+    site for FEATURED_TTL seconds
+    """
+    products = frappe.cache().get_value(FEATURED_KEY)
+    if products is None:
+        products = resolve_image_urls(get_searchitem_products())
+        frappe.cache().set_value(FEATURED_KEY, products, expires_in_sec=FEATURED_TTL)
+    return products
+
+
+def get_bootstrap():
+    """
+    Everything the page needs for its first paint: the user's permission
+    snapshot, the price list results are priced from, featured items and a
+    catalog sync watermark for clients starting a delta sync
+    """
+    price_list = get_price_list()
+    featured = [frappe._dict(product) for product in get_featured_products()]
+    apply_prices(featured, price_list)
+
+    return {
+        "permissions": get_permission_snapshot(),
+        "price_list": price_list,
+        "featured_products": featured,
+        "catalog_watermark": get_current_watermark(),
+    }
+
+
+def render_bootstrap_script(bootstrap):
+    """Inline `bootstrap` as a script tag, safe to embed in HTML"""
+    payload = frappe.as_json(bootstrap, indent=None).replace("</", "<\\/")
+    return f"<script>window.searchitem_bootstrap = {payload};</script>"
@@ -0,0 +1,230 @@
+# Search item cache helpers
+import pickle
+import time
+from collections import OrderedDict
+
+import frappe
+
+BARCODE_MAP_KEY = "searchitem_barcode_map"
+
+
+class LocalLRU:
+    """
+    Small per-worker LRU with a TTL, keyed by site so that multi-site
+    benches never share entries between sites.
+
+    Entries are only invalidated in the worker that saw the change, so the
+    TTL bounds how long other workers can serve a stale value.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def _key(self, key):
+        return (getattr(frappe.local, "site", None), key)
+
+    def get(self, key, default=None):
+        entry = self._data.get(self._key(key))
+        if entry is None:
+            return default
+
+        expires, value = entry
+        if expires < time.monotonic():
+            self._data.pop(self._key(key), None)
+            return default
+
+        self._data.move_to_end(self._key(key))
+        return value
+
+    def set(self, key, value):
+        self._data[self._key(key)] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(self._key(key))
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(self._key(key), None)
+
+    def clear(self):
+        """Drop every entry of the current site"""
+        site = getattr(frappe.local, "site", None)
+        for key in [k for k in self._data if k[0] == site]:
+            del self._data[key]
+
+
+_barcode_lru = LocalLRU(maxsize=4096, ttl=60)
+
+
+def get_barcode_parents(barcode):
+    """
+    Return the item codes that own `barcode`, checking the worker LRU, then
+    the shared Redis map and only then `tabItem Barcode`. Misses are cached
+    too (as an empty list) because unknown barcodes are the common case
+    for the item_code fallback, but only in the worker LRU: every typed
+    query passes through here, so misses in the shared map, which has no
+    TTL, would grow it without bound.
+
+    Entries are keyed by the casefolded barcode, since the lookup matches
+    case-insensitively and invalidation only knows the stored spelling.
+    """
+    if not barcode:
+        return []
+
+    key = barcode.casefold()
+    parents = _barcode_lru.get(key)
+    if parents is not None:
+        return parents
+
+    parents = frappe.cache().hget(BARCODE_MAP_KEY, key)
+    if parents is None:
+        parents = _load_barcode_parents(barcode)
+        if parents:
+            frappe.cache().hset(BARCODE_MAP_KEY, key, parents)
+    parents = list(parents or [])
+    _barcode_lru.set(key, parents)
+    return parents
+
+
+def _load_barcode_parents(barcode):
+    return frappe.get_all(
+        "Item Barcode",
+        filters={"barcode": barcode, "parenttype": "Item"},
+        pluck="parent",
+        limit=5,
+    )
+
+
+def clear_barcode_cache(barcodes=None):
+    """
+    Invalidate cached barcode mappings. Clears the whole map when no
+    barcodes are given.
+    """
+    if barcodes is None:
+        frappe.cache().delete_value(BARCODE_MAP_KEY)
+        _barcode_lru.clear()
+        return
+
+    barcodes = list({b.casefold() for b in barcodes if b})
+    if not barcodes:
+        return
+
+    frappe.cache().hdel(BARCODE_MAP_KEY, barcodes)
+    for barcode in barcodes:
+        _barcode_lru.delete(barcode)
+
+
+def _item_barcodes(doc):
+    barcodes = {row.barcode for row in doc.get("barcodes") or []}
+    before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+    if before:
+        barcodes.update(row.barcode for row in before.get("barcodes") or [])
+    return barcodes
+
+
+def on_item_change(doc, method=None, *args, **kwargs):
+    """doc_events handler for Item save, delete and rename"""
+    try:
+        if method == "after_rename":
+            clear_barcode_cache()
+        else:
+            clear_barcode_cache(_item_barcodes(doc))
+    except Exception as e:
+        frappe.log_error(f"Searchitem Cache Error: {str(e)}", "Searchitem API")
+
+
+def on_item_barcode_change(doc, method=None, *args, **kwargs):
+    """doc_events handler for direct Item Barcode save and delete"""
+    try:
+        barcodes = {doc.barcode}
+        before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+        if before:
+            barcodes.add(before.barcode)
+        clear_barcode_cache(barcodes)
+    except Exception as e:
+        frappe.log_error(f"Searchitem Cache Error: {str(e)}", "Searchitem API")
+
+
+FILE_URL_KEY = "searchitem_file_url"
+
+_file_url_lru = LocalLRU(maxsize=4096, ttl=300)
+
+
+def get_hash_values(key, lru, names, load):
+    """
+    Read-through lookup of `names` in the Redis hash `key`.
+
+    Looks in the worker `lru`, then a single HMGET on the shared hash and
+    finally calls `load(missing)` once for whatever is left. It must return
+    a value for every name it is given; those are written back to the hash
+    with one pipeline and to the LRU.
+    """
+    values = {}
+    missing = []
+
+    for name in names:
+        value = lru.get(name)
+        if value is None:
+            missing.append(name)
+        else:
+            values[name] = value
+
+    if missing:
+        redis = frappe.cache()
+        try:
+            cached = redis.hmget(redis.make_key(key), missing)
+        except Exception:
+            cached = [None] * len(missing)
+
+        still_missing = []
+        for name, value in zip(missing, cached, strict=True):
+            if value is None:
+                still_missing.append(name)
+            else:
+                values[name] = pickle.loads(value)
+                lru.set(name, values[name])
+        missing = still_missing
+
+    if missing:
+        loaded = load(missing)
+        redis = frappe.cache()
+        pipeline = redis.pipeline()
+        for name in missing:
+            values[name] = loaded[name]
+            pipeline.hset(redis.make_key(key), name, pickle.dumps(values[name]))
+            lru.set(name, values[name])
+        pipeline.execute()
+
+    return values
+
+
+def get_file_urls(file_names):
+    """
+    Map File names to their `file_url` in one pass, see `get_hash_values`.
+    Names that are not File documents map to an empty string so they are
+    not looked up again.
+    """
+    file_names = [name for name in set(file_names or []) if name]
+    return get_hash_values(FILE_URL_KEY, _file_url_lru, file_names, _load_file_urls)
+
+
+def _load_file_urls(file_names):
+    found = dict(
+        frappe.get_all(
+            "File",
+            filters={"name": ["in", file_names]},
+            fields=["name", "file_url"],
+            as_list=True,
+        )
+    )
+    return {name: found.get(name) or "" for name in file_names}
+
+
+def on_file_change(doc, method=None, *args, **kwargs):
+    """doc_events handler for File save and delete"""
+    try:
+        frappe.cache().hdel(FILE_URL_KEY, doc.name)
+        _file_url_lru.delete(doc.name)
+    except Exception as e:
+        frappe.log_error(f"Searchitem Cache Error: {str(e)}", "Searchitem API")
@@ -0,0 +1,260 @@
+# Search item catalog export API
+import json
+import zlib
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, cint, get_datetime, now, now_datetime
+from werkzeug.wrappers import Response
+
+from searchitem.api.pricing import get_item_prices, get_price_list
+from searchitem.api.products import decode_cursor, encode_cursor, resolve_image_urls
+
+# Items read per chunk; memory use is bounded by this, not the catalog size
+EXPORT_CHUNK_SIZE = 2000
+
+# Default and maximum items returned per delta sync call
+SYNC_PAGE_SIZE = 1000
+MAX_SYNC_PAGE_SIZE = 5000
+# Watermarks trail the clock so rows from transactions committing late are
+# sent again rather than missed; clients apply changes idempotently
+SYNC_LAG_SECONDS = 10
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "msgpack": "application/x-msgpack",
+}
+
+
+def iter_catalog_chunks(chunk_size=EXPORT_CHUNK_SIZE, price_list=None):
+    """
+    Yield lists of compact catalog records for active stock items, walking
+    tabItem in primary key order with keyset chunks. Each chunk costs one
+    Item/Item Barcode query plus one File lookup for its images.
+    """
+    last_name = ""
+    while True:
+        rows = frappe.db.sql(
+            """
+            select item.name, item.item_code, item.item_name, item.standard_rate,
+                item.stock_uom, item.image, barcode.barcode
+            from (
+                select name, item_code, item_name, standard_rate, stock_uom, image
+                from `tabItem`
+                where disabled = 0 and is_stock_item = 1 and name > %(last_name)s
+                order by name
+                limit %(chunk_size)s
+            ) item
+            left join `tabItem Barcode` barcode
+                on barcode.parent = item.name and barcode.parenttype = 'Item'
+            order by item.name, barcode.idx
+            """,
+            {"last_name": last_name, "chunk_size": cint(chunk_size)},
+            as_dict=True,
+        )
+        if not rows:
+            return
+
+        records = build_catalog_records(rows, price_list)
+        yield records
+
+        last_name = records[-1]["name"]
+
+
+def build_catalog_records(rows, price_list=None):
+    """
+    Fold Item rows left joined with their barcodes (ordered by item) into
+    one compact record per item, with image URLs resolved and `rate` taken
+    from `price_list` (by default `get_price_list()`) when the item has a
+    price there
+    """
+    records = []
+    for row in rows:
+        if not records or records[-1]["name"] != row.name:
+            records.append(
+                frappe._dict(
+                    name=row.name,
+                    item_code=row.item_code,
+                    item_name=row.item_name,
+                    barcodes=[],
+                    rate=row.standard_rate,
+                    uom=row.stock_uom,
+                    image=row.image,
+                )
+            )
+            if "modified" in row:
+                records[-1]["modified"] = row.modified
+        if row.barcode:
+            records[-1]["barcodes"].append(row.barcode)
+
+    # Thumbnail URLs are left out to keep records compact
+    resolve_image_urls(records, thumbnails=False)
+
+    prices = get_item_prices(
+        price_list or get_price_list(), [record["item_code"] for record in records]
+    )
+    for record in records:
+        rates = prices.get(record["item_code"]) or {}
+        record["rate"] = rates.get(record["uom"] or "", rates.get("", record["rate"]))
+    return records
+
+
+def _serializer(fmt):
+    if fmt == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            frappe.throw(_("msgpack is not installed on this server, use the ndjson format"))
+        return lambda record: msgpack.packb(record, default=str)
+
+    return lambda record: (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode()
+
+
+def _stream(site, request, serialize, compress, price_list):
+    """
+    Re-attach to the site, since the request context is gone once streaming
+    starts. The session is Administrator's from here on, so anything that
+    depends on the caller, like `price_list`, is resolved beforehand.
+    """
+    frappe.init(site=site)
+    frappe.connect()
+    frappe.local.request = request
+    try:
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        for records in iter_catalog_chunks(price_list=price_list):
+            data = b"".join(serialize(record) for record in records)
+            data = compressor.compress(data) if compressor else data
+            if data:
+                yield data
+        if compressor:
+            yield compressor.flush()
+    finally:
+        frappe.destroy()
+
+
+@frappe.whitelist()
+def export_catalog(format="ndjson", compress=1):
+    """
+    Stream a snapshot of the active stock catalog for offline terminals
+
+    Each record holds item_code, item_name, barcodes, rate, uom and image.
+    The body is NDJSON (or a stream of msgpack objects), gzip compressed
+    unless `compress=0`, and is generated chunk by chunk so server memory
+    stays flat regardless of catalog size.
+    """
+    if not frappe.has_permission("Item", "read"):
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+    if format not in EXPORT_FORMATS:
+        frappe.throw(_("Unsupported export format: {0}").format(format))
+
+    serialize = _serializer(format)
+    compress = cint(compress)
+    extension = "ndjson" if format == "ndjson" else "msgpack"
+
+    response = Response(
+        _stream(frappe.local.site, frappe.local.request, serialize, compress, get_price_list()),
+        mimetype=EXPORT_FORMATS[format],
+        direct_passthrough=True,
+    )
+    response.headers["Content-Disposition"] = f'attachment; filename="catalog.{extension}"'
+    response.headers["X-Catalog-Generated-At"] = now()
+    response.headers["X-Catalog-Watermark"] = get_current_watermark()
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def get_current_watermark():
+    """Watermark to start delta syncs from after a full snapshot taken now"""
+    return encode_cursor(add_to_date(now_datetime(), seconds=-SYNC_LAG_SECONDS), "")
+
+
+@frappe.whitelist()
+def get_catalog_changes(watermark=None, limit=SYNC_PAGE_SIZE):
+    """
+    Delta sync for client-side catalogs
+
+    Returns the active stock items changed since `watermark` as the same
+    compact records as `export_catalog` (barcodes are always sent in full),
+    plus tombstones for items disabled, no longer stock items or deleted.
+    Call again with `next_watermark` until `has_more` is false; without a
+    watermark the whole active catalog is paged through and no tombstones
+    are sent. Changes may repeat across calls and must be applied
+    idempotently.
+
+    Only rows modified at least SYNC_LAG_SECONDS ago are returned, on every
+    page, so a watermark never moves past a transaction that may still
+    commit with an earlier `modified`.
+    """
+    if not frappe.has_permission("Item", "read"):
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+    limit = min(max(cint(limit), 1), MAX_SYNC_PAGE_SIZE)
+    initial = not watermark
+    if initial:
+        since, last_name = get_datetime("1900-01-01"), ""
+    else:
+        since, last_name = decode_cursor(watermark)
+
+    sync_started = add_to_date(now_datetime(), seconds=-SYNC_LAG_SECONDS)
+    rows = frappe.db.sql(
+        f"""
+        select item.name, item.item_code, item.item_name, item.standard_rate,
+            item.stock_uom, item.image, item.modified, item.active, barcode.barcode
+        from (
+            select name, item_code, item_name, standard_rate, stock_uom, image, modified,
+                (disabled = 0 and is_stock_item = 1) as active
+            from `tabItem`
+            where (modified > %(since)s or (modified = %(since)s and name > %(last_name)s))
+                and modified <= %(sync_started)s
+                {"and disabled = 0 and is_stock_item = 1" if initial else ""}
+            order by modified, name
+            limit %(limit)s
+        ) item
+        left join `tabItem Barcode` barcode
+            on barcode.parent = item.name and barcode.parenttype = 'Item'
+        order by item.modified, item.name, barcode.idx
+        """,
+        {"since": since, "last_name": last_name, "sync_started": sync_started, "limit": limit + 1},
+        as_dict=True,
+    )
+
+    records = build_catalog_records(rows)
+    has_more = len(records) > limit
+    records = records[:limit]
+
+    if has_more:
+        upper = records[-1]["modified"]
+        next_watermark = encode_cursor(upper, records[-1]["name"])
+    else:
+        upper = now_datetime()
+        next_watermark = encode_cursor(max(sync_started, since), "")
+
+    active = {row.name for row in rows if row.active}
+    items, tombstones = [], []
+    for record in records:
+        if record["name"] in active:
+            items.append(record)
+        elif not initial:
+            tombstones.append({"name": record["name"], "reason": "inactive", "modified": record["modified"]})
+
+    if not initial:
+        for deleted in frappe.get_all(
+            "Deleted Document",
+            fields=["deleted_name", "creation"],
+            filters=[
+                ["deleted_doctype", "=", "Item"],
+                ["creation", ">", since],
+                ["creation", "<=", upper],
+            ],
+            order_by="creation asc",
+        ):
+            tombstones.append({"name": deleted.deleted_name, "reason": "deleted", "modified": deleted.creation})
+
+    return {
+        "items": items,
+        "tombstones": tombstones,
+        "next_watermark": next_watermark,
+        "has_more": has_more,
+    }
@@ -0,0 +1,100 @@
+# Search item request coalescing
+import functools
+import hashlib
+import inspect
+import pickle
+
+import frappe
+from frappe.utils import cint
+
+from searchitem.api.pricing import get_price_list
+from searchitem.api.trace import trace
+
+# Seconds a caller waits for an identical in-flight lookup before computing itself
+WAIT_SECONDS = 3
+
+
+def get_ttl():
+    """Seconds a coalesced result is shared; 0 (the default) disables coalescing"""
+    return cint(frappe.conf.get("searchitem_coalesce_ttl"))
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        # Matches the case-insensitive collation the lookups run under
+        return value.strip().casefold()
+    return value
+
+
+def make_key(namespace, arguments):
+    payload = repr(sorted((name, _normalize(value)) for name, value in arguments.items()))
+    return f"searchitem_single_flight|{namespace}|{hashlib.sha1(payload.encode()).hexdigest()}"
+
+
+def single_flight(key, compute, ttl):
+    """
+    Run `compute` once across all workers for concurrent identical calls.
+
+    The first caller takes a Redis lock and publishes its result for `ttl`
+    seconds; callers arriving meanwhile wait on the lock and reuse that
+    result instead of querying the database again.
+    """
+    cache = frappe.cache()
+    result_key = cache.make_key(key)
+    try:
+        cached = cache.get(result_key)
+        if cached is not None:
+            return pickle.loads(cached)
+
+        lock = cache.lock(
+            cache.make_key(f"{key}|lock"), timeout=WAIT_SECONDS + ttl, blocking_timeout=WAIT_SECONDS
+        )
+        acquired = lock.acquire()
+    except Exception as e:
+        trace("coalesce.redis_error", key=key, error=e)
+        return compute()
+
+    try:
+        if acquired:
+            cached = cache.get(result_key)
+            if cached is not None:
+                return pickle.loads(cached)
+
+        result = compute()
+        if acquired:
+            cache.set(result_key, pickle.dumps(result), ex=ttl)
+        return result
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except Exception:
+                # The lock expired while computing; the next caller already owns it
+                pass
+
+
+def coalesced(fn):
+    """
+    Share the result of identical concurrent calls of an endpoint across
+    workers when `searchitem_coalesce_ttl` is set in site config. Apply
+    below `@frappe.whitelist()`.
+
+    Results carry rates from the caller's price list, so calls are only
+    shared between users pricing from the same list.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        ttl = get_ttl()
+        if ttl <= 0:
+            return fn(*args, **kwargs)
+
+        arguments = dict(signature.bind(*args, **kwargs).arguments)
+        arguments["__price_list"] = get_price_list()
+        key = make_key(fn.__name__, arguments)
+        return single_flight(key, lambda: fn(*args, **kwargs), ttl)
+
+    # Keep the original signature so that frappe only passes known arguments
+    wrapper.__signature__ = signature
+    return wrapper
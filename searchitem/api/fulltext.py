@@ -0,0 +1,115 @@
+# Search item FULLTEXT search helpers
+import re
+
+import frappe
+from frappe.utils import cint
+
+FULLTEXT_INDEX_NAME = "searchitem_item_fulltext"
+FULLTEXT_COLUMNS = ("item_code", "item_name", "description")
+# Cache key remembering the parser of the index on this site, "" when the
+# index does not exist
+FULLTEXT_PARSER_KEY = "searchitem_fulltext_parser"
+# InnoDB ignores tokens shorter than innodb_ft_min_token_size (3 by default)
+MIN_FULLTEXT_QUERY_LENGTH = 3
+# Scripts written without spaces between words (Thai, Lao, Khmer, Myanmar,
+# CJK and Japanese kana), which only the ngram parser can tokenize
+UNSEGMENTED_SCRIPT = re.compile(
+    r"[\u0e00-\u0eff\u1000-\u109f\u1780-\u17ff\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]"
+)
+
+
+def get_fulltext_parser():
+    """
+    Parser of the FULLTEXT index: "ngram", "default", or "" when the index
+    does not exist
+    """
+    return frappe.cache().get_value(FULLTEXT_PARSER_KEY, generator=_detect_fulltext_parser) or ""
+
+
+def has_fulltext_index():
+    return bool(get_fulltext_parser())
+
+
+def _detect_fulltext_parser():
+    if not frappe.db.sql(
+        "show index from `tabItem` where Key_name = %s and Index_type = 'FULLTEXT'",
+        FULLTEXT_INDEX_NAME,
+    ):
+        return ""
+
+    create_table = frappe.db.sql("show create table `tabItem`")[0][1]
+    for line in create_table.splitlines():
+        if f"`{FULLTEXT_INDEX_NAME}`" in line:
+            return "ngram" if "ngram" in line.lower() else "default"
+    return "default"
+
+
+def is_unsegmented(query):
+    """Whether `query` is written in a script without word separators"""
+    return bool(UNSEGMENTED_SCRIPT.search(query or ""))
+
+
+def create_fulltext_index():
+    """
+    Create the FULLTEXT index used by the relevance-ranked search mode.
+
+    The ngram parser (MySQL) tokenizes scripts without word separators
+    such as Thai; servers without it (MariaDB) get the default parser, and
+    `search_items_fulltext` then leaves such queries to `LIKE` matching.
+    """
+    frappe.cache().delete_value(FULLTEXT_PARSER_KEY)
+    if has_fulltext_index():
+        return
+
+    columns = ", ".join(f"`{column}`" for column in FULLTEXT_COLUMNS)
+    try:
+        frappe.db.sql_ddl(
+            f"alter table `tabItem` add fulltext index `{FULLTEXT_INDEX_NAME}` ({columns}) with parser ngram"
+        )
+    except Exception:
+        frappe.db.sql_ddl(f"alter table `tabItem` add fulltext index `{FULLTEXT_INDEX_NAME}` ({columns})")
+
+    frappe.cache().delete_value(FULLTEXT_PARSER_KEY)
+
+
+def search_items_fulltext(query, fields, limit):
+    """
+    Relevance-ranked MATCH ... AGAINST search over active stock items.
+
+    Returns None when the index is missing or the query is too short for
+    it, so that callers can fall back to `LIKE` matching. Without the ngram
+    parser the same happens for queries in scripts without word separators
+    and for queries MATCH finds nothing for, since the default parser only
+    matches whole words.
+    """
+    if len(query) < MIN_FULLTEXT_QUERY_LENGTH:
+        return None
+
+    parser = get_fulltext_parser()
+    if not parser or (parser != "ngram" and is_unsegmented(query)):
+        return None
+
+    columns = ", ".join(f"`{column}`" for column in FULLTEXT_COLUMNS)
+    select = ", ".join(f"`{field}`" for field in fields)
+    try:
+        products = frappe.db.sql(
+            f"""
+            select {select}, match({columns}) against (%(query)s in natural language mode) as relevance
+            from `tabItem`
+            where disabled = 0 and is_stock_item = 1
+                and match({columns}) against (%(query)s in natural language mode)
+            order by relevance desc, modified desc
+            limit %(limit)s
+            """,
+            {"query": query, "limit": cint(limit)},
+            as_dict=True,
+        )
+    except Exception as e:
+        # The index may have been dropped since the parser was cached
+        frappe.cache().delete_value(FULLTEXT_PARSER_KEY)
+        frappe.log_error(f"Searchitem Fulltext Search Error: {str(e)}", "Searchitem API")
+        return None
+
+    if not products and parser != "ngram":
+        return None
+    return products
@@ -0,0 +1,210 @@
+# Search item index advisor
+import frappe
+
+from searchitem.api.fulltext import get_fulltext_parser, has_fulltext_index
+
+# Composite indexes backing searchitem's query shapes, each only created
+# when EXPLAIN shows one of its `shapes` scanning the table
+RECOMMENDED_INDEXES = [
+    {
+        "doctype": "Item",
+        "name": "searchitem_active_item_code",
+        "columns": ["disabled", "is_stock_item", "item_code"],
+        "shapes": ["item_code_exact", "item_code_in"],
+    },
+    {
+        "doctype": "Item",
+        "name": "searchitem_active_modified",
+        "columns": ["disabled", "is_stock_item", "modified"],
+        "shapes": ["product_listing", "product_listing_keyset"],
+    },
+    {
+        "doctype": "Item Barcode",
+        "name": "searchitem_barcode_parent",
+        "columns": ["barcode", "parenttype", "parent"],
+        "shapes": ["barcode_lookup"],
+    },
+    {
+        "doctype": "Bin",
+        "name": "searchitem_bin_item_warehouse",
+        "columns": ["item_code", "warehouse"],
+        "shapes": ["stock_summary"],
+    },
+]
+
+# Representative statements for every query shape issued by searchitem.api.
+# Substring shapes cannot use a B-tree index and are expected to scan.
+QUERY_SHAPES = [
+    {
+        "name": "barcode_lookup",
+        "query": "select parent from `tabItem Barcode` where barcode = %(value)s and parenttype = 'Item'",
+    },
+    {
+        "name": "item_code_exact",
+        "query": """select name from `tabItem`
+            where disabled = 0 and is_stock_item = 1 and item_code = %(value)s""",
+    },
+    {
+        "name": "item_code_in",
+        "query": """select name from `tabItem`
+            where disabled = 0 and is_stock_item = 1 and item_code in (%(value)s, %(other)s)""",
+    },
+    {
+        "name": "product_listing",
+        "query": """select name from `tabItem`
+            where disabled = 0 and is_stock_item = 1 order by modified desc limit 50""",
+    },
+    {
+        "name": "product_listing_keyset",
+        "query": """select name from `tabItem`
+            where disabled = 0 and is_stock_item = 1
+                and (modified < %(modified)s or (modified = %(modified)s and name < %(value)s))
+            order by modified desc, name desc limit 50""",
+    },
+    {
+        "name": "stock_summary",
+        "query": """select item_code, warehouse, sum(actual_qty) from `tabBin`
+            where item_code in (%(value)s, %(other)s) group by item_code, warehouse""",
+    },
+    {
+        "name": "item_code_partial",
+        "query": """select name from `tabItem`
+            where disabled = 0 and is_stock_item = 1 and item_code like %(like_value)s""",
+        "expects_scan": True,
+    },
+    {
+        "name": "item_name_partial",
+        "query": """select name from `tabItem`
+            where disabled = 0 and is_stock_item = 1 and item_name like %(like_value)s""",
+        "expects_scan": True,
+    },
+]
+
+SAMPLE_VALUES = {
+    "value": "searchitem-probe",
+    "other": "searchitem-probe-2",
+    "like_value": "%probe%",
+    "modified": "2000-01-01 00:00:00",
+}
+
+
+def get_table_indexes(table):
+    """Return `{index_name: [columns in order]}` for a table"""
+    indexes = {}
+    for row in frappe.db.sql(f"show index from `{table}`", as_dict=True):
+        indexes.setdefault(row.Key_name, []).append((row.Seq_in_index, row.Column_name))
+    return {name: [column for _seq, column in sorted(columns)] for name, columns in indexes.items()}
+
+
+def find_covering_index(table, columns):
+    """Return the name of an index whose leading columns are `columns`, if any"""
+    for name, index_columns in get_table_indexes(table).items():
+        if index_columns[: len(columns)] == list(columns):
+            return name
+    return None
+
+
+def ensure_indexes(plans=None):
+    """
+    Create the recommended indexes whose query shapes EXPLAIN shows doing
+    a full scan (in `plans`, by default from `explain_query_shapes`) and
+    that no existing index already covers
+    """
+    if plans is None:
+        plans = explain_query_shapes()
+    scanning = {plan["name"] for plan in plans if plan.get("full_scan") and not plan["expects_scan"]}
+
+    created = []
+    for definition in RECOMMENDED_INDEXES:
+        if not scanning.intersection(definition["shapes"]):
+            continue
+        if not frappe.db.table_exists(definition["doctype"]):
+            continue
+        if find_covering_index(f"tab{definition['doctype']}", definition["columns"]):
+            continue
+
+        try:
+            frappe.db.add_index(definition["doctype"], definition["columns"], definition["name"])
+            created.append(definition["name"])
+        except Exception as e:
+            frappe.log_error(
+                f"Searchitem Index Error creating {definition['name']}: {str(e)}", "Searchitem API"
+            )
+    return created
+
+
+def explain_query_shapes():
+    """Run EXPLAIN on every query shape and flag unexpected full scans"""
+    plans = []
+    for shape in QUERY_SHAPES:
+        plan = {"name": shape["name"], "expects_scan": bool(shape.get("expects_scan"))}
+        try:
+            rows = frappe.db.sql(f"explain {shape['query']}", SAMPLE_VALUES, as_dict=True)
+            plan["plan"] = [
+                {
+                    "table": row.get("table"),
+                    "type": row.get("type"),
+                    "key": row.get("key"),
+                    "rows": row.get("rows"),
+                    "extra": row.get("Extra"),
+                }
+                for row in rows
+            ]
+            plan["full_scan"] = any(row.get("type") == "ALL" for row in rows)
+            plan["ok"] = plan["expects_scan"] or not plan["full_scan"]
+        except Exception as e:
+            plan["error"] = str(e)
+            plan["ok"] = False
+        plans.append(plan)
+    return plans
+
+
+def after_migrate():
+    """
+    Provision the indexes missing for scanning query shapes and log any
+    shape still doing a full scan; `get_index_health` reports the rest
+    """
+    try:
+        plans = explain_query_shapes()
+        if ensure_indexes(plans):
+            plans = explain_query_shapes()
+        regressions = [plan["name"] for plan in plans if not plan["ok"]]
+        if regressions:
+            frappe.log_error(
+                f"Searchitem query shapes doing full scans: {', '.join(regressions)}", "Searchitem API"
+            )
+    except Exception as e:
+        frappe.log_error(f"Searchitem Index Advisor Error: {str(e)}", "Searchitem API")
+
+
+@frappe.whitelist()
+def get_index_health():
+    """
+    Report index coverage and EXPLAIN plans for searchitem's query shapes
+    """
+    frappe.only_for("System Manager")
+
+    plans = explain_query_shapes()
+    scanning = {plan["name"] for plan in plans if plan.get("full_scan") and not plan["expects_scan"]}
+
+    indexes = []
+    for definition in RECOMMENDED_INDEXES:
+        covering = find_covering_index(f"tab{definition['doctype']}", definition["columns"])
+        needed = bool(scanning.intersection(definition["shapes"]))
+        indexes.append(
+            {
+                "doctype": definition["doctype"],
+                "columns": definition["columns"],
+                "covered_by": covering,
+                "needed": needed,
+                "ok": bool(covering) or not needed,
+            }
+        )
+
+    return {
+        "ok": all(index["ok"] for index in indexes) and all(plan["ok"] for plan in plans),
+        "indexes": indexes,
+        "query_shapes": plans,
+        "fulltext_index": has_fulltext_index(),
+        "fulltext_parser": get_fulltext_parser() or None,
+    }
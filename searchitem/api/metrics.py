@@ -0,0 +1,178 @@
+# Search item metrics
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+
+import frappe
+
+from searchitem.api.trace import trace
+
+METRICS_KEY = "searchitem_metrics"
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# name: (type, label name, help)
+METRICS = {
+    "searchitem_endpoint_seconds": ("histogram", "endpoint", "Latency of searchitem API endpoints"),
+    "searchitem_search_tier_seconds": (
+        "histogram",
+        "tier",
+        "Time spent in each search_product_unified tier",
+    ),
+    "searchitem_search_results_total": (
+        "counter",
+        "tier",
+        "search_product_unified calls by the tier that matched",
+    ),
+}
+
+
+def is_enabled():
+    return bool(frappe.conf.get("searchitem_metrics"))
+
+
+def _pending():
+    if not hasattr(frappe.local, "searchitem_metrics"):
+        frappe.local.searchitem_metrics = []
+    return frappe.local.searchitem_metrics
+
+
+def observe(metric, label, seconds):
+    """Queue a histogram observation, written to Redis by `flush`"""
+    if is_enabled():
+        _pending().append(("observe", metric, label, seconds))
+
+
+def increment(metric, label, value=1):
+    """Queue a counter increment, written to Redis by `flush`"""
+    if is_enabled():
+        _pending().append(("increment", metric, label, value))
+
+
+@contextmanager
+def timer(metric, label):
+    """Observe the time spent in the block"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(metric, label, time.perf_counter() - start)
+
+
+def flush():
+    """Write queued observations to Redis with a single pipeline"""
+    pending = getattr(frappe.local, "searchitem_metrics", None)
+    if not pending:
+        return
+
+    frappe.local.searchitem_metrics = []
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(METRICS_KEY)
+        pipeline = cache.pipeline()
+        for kind, metric, label, value in pending:
+            if kind == "increment":
+                pipeline.hincrby(key, f"c|{metric}|{label}", value)
+                continue
+
+            bucket = next((i for i, bound in enumerate(BUCKETS) if value <= bound), len(BUCKETS))
+            pipeline.hincrby(key, f"h|{metric}|{label}|{bucket}", 1)
+            pipeline.hincrbyfloat(key, f"s|{metric}|{label}", value)
+        pipeline.execute()
+    except Exception as e:
+        trace("metrics.flush_error", error=e)
+
+
+def timed_endpoint(fn):
+    """
+    Record the latency of a whitelisted endpoint and flush the metrics it
+    queued. Apply below `@frappe.whitelist()`.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not is_enabled():
+            return fn(*args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            observe("searchitem_endpoint_seconds", fn.__name__, time.perf_counter() - start)
+            flush()
+
+    # Keep the original signature so that frappe only passes known arguments
+    wrapper.__signature__ = inspect.signature(fn)
+    return wrapper
+
+
+def _format_label(label_name, label, **extra):
+    labels = {label_name: label, **extra}
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def render_prometheus():
+    """Render the aggregated metrics in Prometheus text exposition format"""
+    cache = frappe.cache()
+    raw = cache.hgetall(cache.make_key(METRICS_KEY)) or {}
+
+    histograms, sums, counters = {}, {}, {}
+    for field, value in raw.items():
+        parts = frappe.safe_decode(field).split("|")
+        value = frappe.safe_decode(value)
+        if parts[0] == "h":
+            histograms.setdefault((parts[1], parts[2]), {})[int(parts[3])] = int(value)
+        elif parts[0] == "s":
+            sums[(parts[1], parts[2])] = float(value)
+        elif parts[0] == "c":
+            counters[(parts[1], parts[2])] = int(value)
+
+    lines = []
+    for metric, (metric_type, label_name, help_text) in METRICS.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+
+        if metric_type == "counter":
+            for (name, label), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{metric}{{{_format_label(label_name, label)}}} {value}")
+            continue
+
+        for (name, label), buckets in sorted(histograms.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for i, bound in enumerate(BUCKETS):
+                cumulative += buckets.get(i, 0)
+                lines.append(f"{metric}_bucket{{{_format_label(label_name, label, le=bound)}}} {cumulative}")
+            cumulative += buckets.get(len(BUCKETS), 0)
+            lines.append(f"{metric}_bucket{{{_format_label(label_name, label, le='+Inf')}}} {cumulative}")
+            lines.append(f"{metric}_sum{{{_format_label(label_name, label)}}} {sums.get((name, label), 0.0)}")
+            lines.append(f"{metric}_count{{{_format_label(label_name, label)}}} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+@frappe.whitelist()
+def get_metrics():
+    """
+    Expose searchitem metrics for Prometheus scraping
+    """
+    frappe.only_for("System Manager")
+
+    frappe.response["type"] = "download"
+    frappe.response["filename"] = "metrics.txt"
+    frappe.response["filecontent"] = render_prometheus()
+    frappe.response["content_type"] = "text/plain; version=0.0.4; charset=utf-8"
+    frappe.response["display_content_as"] = "inline"
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_metrics():
+    """
+    Clear the aggregated metrics
+    """
+    frappe.only_for("System Manager")
+    frappe.cache().delete_value(METRICS_KEY)
@@ -1,20 +1,87 @@
 import frappe
 from frappe import _
 
+# Permission snapshots are cached per user; the TTL bounds staleness from
+# permission changes that do not fire a hook (e.g. Role Permission Manager)
+PERMISSIONS_KEY = "searchitem_permissions"
+PERMISSIONS_TTL = 300
+
+def get_permission_snapshot(user=None):
+    """
+    Return the cached searchitem permission snapshot of `user` (the session
+    user by default), building it on a miss
+    """
+    user = user or frappe.session.user
+    key = f"{PERMISSIONS_KEY}|{user}"
+    snapshot = frappe.cache().get_value(key)
+    if snapshot is None:
+        snapshot = build_permission_snapshot(user)
+        frappe.cache().set_value(key, snapshot, expires_in_sec=PERMISSIONS_TTL)
+    return snapshot
+
+# snapshot key: (doctype, permission type)
+DOCTYPE_PERMISSIONS = {
+    "can_read_items": ("Item", "read"),
+    "can_write_items": ("Item", "write"),
+    "can_create_items": ("Item", "create"),
+    "can_delete_items": ("Item", "delete"),
+    "can_read_warehouses": ("Warehouse", "read"),
+    "can_read_suppliers": ("Supplier", "read")
+}
+
+# snapshot key: role
+ROLE_FLAGS = {
+    "is_system_manager": "System Manager",
+    "is_stock_user": "Stock User",
+    "is_purchase_user": "Purchase User"
+}
+
+def build_permission_snapshot(user):
+    """
+    Evaluate every permission searchitem needs for `user` in one pass
+    """
+    if user == "Guest":
+        return dict.fromkeys([*DOCTYPE_PERMISSIONS, *ROLE_FLAGS], False)
+    
+    roles = set(frappe.get_roles(user))
+    snapshot = {
+        key: bool(frappe.has_permission(doctype, ptype, user=user))
+        for key, (doctype, ptype) in DOCTYPE_PERMISSIONS.items()
+    }
+    snapshot.update({key: role in roles for key, role in ROLE_FLAGS.items()})
+    return snapshot
+
+def clear_permission_cache(user=None):
+    """
+    Drop the snapshot of `user`, or of every user when no user is given
+    """
+    try:
+        if user:
+            frappe.cache().delete_value(f"{PERMISSIONS_KEY}|{user}")
+        else:
+            frappe.cache().delete_keys(f"{PERMISSIONS_KEY}|")
+    except Exception as e:
+        frappe.log_error(f"Searchitem Permission Cache Error: {str(e)}", "Searchitem API")
+
+def on_user_change(doc, method=None, *args, **kwargs):
+    """doc_events handler for User save and delete (roles live on the User)"""
+    clear_permission_cache(doc.name)
+
+def on_user_permission_change(doc, method=None, *args, **kwargs):
+    """doc_events handler for User Permission save and delete"""
+    clear_permission_cache(doc.user)
+
+def on_role_change(doc, method=None, *args, **kwargs):
+    """doc_events handler for changes affecting every user's permissions"""
+    clear_permission_cache()
+
 def has_app_permission():
     """
     Check if user has permission to access the searchitem app
     """
     try:
-        # Allow access to all authenticated users
-        if frappe.session.user == "Guest":
-            return False
-        
-        # Check if user has Item read permission
-        if not frappe.has_permission("Item", "read"):
-            return False
-        
-        return True
+        # Guests get a snapshot without Item read permission
+        return get_permission_snapshot()["can_read_items"]
         
     except Exception:
         return False
@@ -24,21 +91,7 @@ def get_user_permissions():
     Get user permissions for searchitem functionality
     """
     try:
-        user = frappe.get_doc("User", frappe.session.user)
-        
-        permissions = {
-            "can_read_items": frappe.has_permission("Item", "read"),
-            "can_write_items": frappe.has_permission("Item", "write"),
-            "can_create_items": frappe.has_permission("Item", "create"),
-            "can_delete_items": frappe.has_permission("Item", "delete"),
-            "can_read_warehouses": frappe.has_permission("Warehouse", "read"),
-            "can_read_suppliers": frappe.has_permission("Supplier", "read"),
-            "is_system_manager": "System Manager" in frappe.get_roles(),
-            "is_stock_user": "Stock User" in frappe.get_roles(),
-            "is_purchase_user": "Purchase User" in frappe.get_roles()
-        }
-        
-        return permissions
+        return dict(get_permission_snapshot())
         
     except Exception as e:
         frappe.log_error(f"Searchitem Permission Error: {str(e)}", "Searchitem API")
@@ -49,12 +102,14 @@ def validate_item_access(item_code):
     Validate if user has access to specific item
     """
     try:
-        if not frappe.has_permission("Item", "read"):
+        if not get_permission_snapshot()["can_read_items"]:
             frappe.throw(_("You don't have permission to read items"))
         
         # Check if item exists and is not disabled
-        item = frappe.get_doc("Item", item_code)
-        if item.disabled:
+        disabled = frappe.db.get_value("Item", item_code, "disabled")
+        if disabled is None:
+            frappe.throw(_("Item {0} not found").format(item_code), frappe.DoesNotExistError)
+        if disabled:
             frappe.throw(_("Item is disabled"))
         
         return True
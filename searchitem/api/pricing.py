@@ -0,0 +1,178 @@
+# Search item price index
+import pickle
+
+import frappe
+from frappe.utils import flt
+
+from searchitem.api.trace import trace
+
+# Redis hash of "price_list|item_code" -> {uom: rate}, kept current from the
+# Item Price doc_events
+PRICE_INDEX_KEY = "searchitem_price_index"
+
+
+def get_price_list():
+    """
+    Price list results are priced from: `searchitem_price_list` in site
+    config, then the user's default selling price list, then the one set in
+    Selling Settings
+    """
+    return (
+        frappe.conf.get("searchitem_price_list")
+        or frappe.defaults.get_user_default("selling_price_list")
+        or frappe.db.get_single_value("Selling Settings", "selling_price_list")
+    )
+
+
+def get_item_prices(price_list, item_codes):
+    """
+    Return `{item_code: {uom: rate}}` for a set of items in `price_list`.
+
+    Entries are read from the Redis price index with a single HMGET; only
+    items missing there are loaded from Item Price, with one query.
+    """
+    item_codes = [code for code in set(item_codes or []) if code]
+    if not price_list or not item_codes:
+        return {}
+
+    prices = {}
+    missing = item_codes
+    cache = frappe.cache()
+    try:
+        cached = cache.hmget(
+            cache.make_key(PRICE_INDEX_KEY), [f"{price_list}|{code}" for code in item_codes]
+        )
+        missing = []
+        for item_code, value in zip(item_codes, cached, strict=True):
+            if value is None:
+                missing.append(item_code)
+            else:
+                prices[item_code] = pickle.loads(value)
+    except Exception as e:
+        trace("pricing.cache_error", error=e)
+
+    if missing:
+        loaded = load_item_prices(price_list, missing)
+        prices.update(loaded)
+        # Fill without overwriting, so a refresh published after an Item
+        # Price change committed wins over a read that started before it
+        _store(price_list, loaded, overwrite=False)
+
+    return prices
+
+
+def load_item_prices(price_list, item_codes):
+    """
+    Load the generic (not customer, supplier or batch specific) prices in
+    effect today for a set of items. Every item gets an entry, empty when
+    it has no price.
+    """
+    rows = frappe.db.sql(
+        """
+        select item_code, ifnull(uom, '') as uom, price_list_rate
+        from `tabItem Price`
+        where price_list = %(price_list)s and item_code in %(item_codes)s
+            and ifnull(customer, '') = '' and ifnull(supplier, '') = ''
+            and ifnull(batch_no, '') = ''
+            and (valid_from is null or valid_from <= curdate())
+            and (valid_upto is null or valid_upto >= curdate())
+        order by valid_from desc, modified desc
+        """,
+        {"price_list": price_list, "item_codes": tuple(item_codes)},
+        as_dict=True,
+    )
+
+    prices = {item_code: {} for item_code in item_codes}
+    for row in rows:
+        # The most recently effective price wins
+        prices.setdefault(row.item_code, {}).setdefault(row.uom, flt(row.price_list_rate))
+    return prices
+
+
+def _store(price_list, prices, overwrite=True):
+    if not prices:
+        return
+
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(PRICE_INDEX_KEY)
+        pipeline = cache.pipeline()
+        for item_code, rates in prices.items():
+            field = f"{price_list}|{item_code}"
+            if overwrite:
+                pipeline.hset(key, field, pickle.dumps(rates))
+            else:
+                pipeline.hsetnx(key, field, pickle.dumps(rates))
+        pipeline.execute()
+    except Exception as e:
+        trace("pricing.cache_error", error=e)
+
+
+def apply_prices(products, price_list=None):
+    """
+    Set `rate` on every product to its price in `price_list` (by default
+    `get_price_list()`) for its stock UOM, falling back to standard_rate.
+    `price_list` is set to the list the rate came from, None on fallback.
+    """
+    price_list = price_list or get_price_list()
+    try:
+        prices = get_item_prices(price_list, [product.get("item_code") for product in products])
+    except Exception as e:
+        trace("pricing.error", price_list=price_list, error=e)
+        prices = {}
+
+    for product in products:
+        rates = prices.get(product.get("item_code")) or {}
+        rate = rates.get(product.get("stock_uom") or "", rates.get(""))
+        if rate is None:
+            product["rate"] = product.get("standard_rate")
+            product["price_list"] = None
+        else:
+            product["rate"] = rate
+            product["price_list"] = price_list
+
+    return products
+
+
+def clear_price_index():
+    """Drop the whole index, so prices whose validity started or ended reload"""
+    frappe.cache().delete_value(PRICE_INDEX_KEY)
+
+
+def _refresh_pending():
+    pending = getattr(frappe.local, "searchitem_price_pending", None)
+    frappe.local.searchitem_price_pending = None
+    try:
+        by_price_list = {}
+        for price_list, item_code in pending or ():
+            by_price_list.setdefault(price_list, set()).add(item_code)
+        for price_list, item_codes in by_price_list.items():
+            _store(price_list, load_item_prices(price_list, item_codes))
+    except Exception as e:
+        frappe.log_error(f"Searchitem Price Index Error: {str(e)}", "Searchitem API")
+
+
+def _discard_pending():
+    frappe.local.searchitem_price_pending = None
+
+
+def on_item_price_change(doc, method=None, *args, **kwargs):
+    """
+    doc_events handler for Item Price save and delete
+
+    The affected entries are recomputed once per transaction, after it
+    commits.
+    """
+    try:
+        pending = getattr(frappe.local, "searchitem_price_pending", None)
+        if pending is None:
+            pending = frappe.local.searchitem_price_pending = set()
+            frappe.db.after_commit.add(_refresh_pending)
+            frappe.db.after_rollback.add(_discard_pending)
+
+        pending.add((doc.price_list, doc.item_code))
+        before = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+        if before:
+            pending.add((before.price_list, before.item_code))
+    except Exception as e:
+        frappe.log_error(f"Searchitem Price Index Error: {str(e)}", "Searchitem API")
@@ -1,12 +1,45 @@
+import base64
+import json
+
 import frappe
 from frappe import _
+from frappe.utils import cint, get_datetime
+
+from searchitem.api.bloom import is_unknown_scan, skips_substring_tiers
+from searchitem.api.cache import get_barcode_parents, get_file_urls
+from searchitem.api.coalesce import coalesced
+from searchitem.api.fulltext import search_items_fulltext
+from searchitem.api.metrics import increment, timed_endpoint, timer
+from searchitem.api.pricing import apply_prices
+from searchitem.api.slowlog import recorded_endpoint
+from searchitem.api.stock import get_stock_summary
+from searchitem.api.thumbnails import add_thumbnail_urls
+from searchitem.api.trace import trace
+from searchitem.api.trigram import find_substring_candidates
+
+# Tier tags returned in `search_method`, in priority order
+SEARCH_TIERS = ("barcode", "item_code_exact", "item_code_partial", "item_name")
+
+# Metric names, see searchitem.api.metrics
+TIER_SECONDS = "searchitem_search_tier_seconds"
+RESULTS_TOTAL = "searchitem_search_results_total"
 
 @frappe.whitelist()
-def get_products(limit=50, offset=0):
+@timed_endpoint
+@recorded_endpoint
+def get_products(limit=50, offset=0, cursor=None, paginate=None):
     """
     Get products for searchitem with performance optimizations
+
+    Pass `paginate="keyset"` (or a `cursor` from a previous page) to page on
+    (modified, name) instead of offsets. The response is then
+    `{"products": [...], "next_cursor": ...}`, with `next_cursor` None on
+    the last page.
     """
     try:
+        if cursor or paginate == "keyset":
+            return get_products_page(limit, cursor)
+        
         # Use optimized query with specific fields only
         products = frappe.get_all(
             "Item",
@@ -23,20 +56,81 @@ def get_products(limit=50, offset=0):
             order_by="modified desc"
         )
         
-        # Add image URLs safely
-        for product in products:
-            product.image = get_safe_image_url(product.image)
+        # Add image URLs and price list rates safely
+        resolve_image_urls(products)
+        apply_prices(products)
         
         return products
         
+    except frappe.ValidationError:
+        raise
     except Exception as e:
         frappe.log_error(f"Searchitem API Error: {str(e)}", "Searchitem API")
         return []
 
+def encode_cursor(modified, name):
+    """Encode a (modified, name) keyset position as an opaque string"""
+    payload = frappe.as_json([str(modified), name], indent=None)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Decode a cursor from `encode_cursor`, throwing on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        modified, name = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return get_datetime(modified), name
+    except Exception:
+        frappe.throw(_("Invalid pagination cursor"))
+
+def get_products_page(limit, cursor=None):
+    """
+    Keyset-paginated product listing, newest first
+
+    Each page costs one index range read regardless of depth, and rows
+    modified while paging do not shift the pages still to come.
+    """
+    limit = min(max(cint(limit), 1), 500)
+    conditions = ""
+    values = {"limit": limit + 1}
+    if cursor:
+        values["modified"], values["name"] = decode_cursor(cursor)
+        conditions = """and (modified < %(modified)s
+            or (modified = %(modified)s and name < %(name)s))"""
+    
+    rows = frappe.db.sql(
+        f"""
+        select {", ".join(f"`{field}`" for field in PRODUCT_FIELDS)}, modified
+        from `tabItem`
+        where disabled = 0 and is_stock_item = 1 {conditions}
+        order by modified desc, name desc
+        limit %(limit)s
+        """,
+        values,
+        as_dict=True,
+    )
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].modified, rows[-1].name)
+    
+    for row in rows:
+        del row["modified"]
+    resolve_image_urls(rows)
+    apply_prices(rows)
+    
+    return {"products": rows, "next_cursor": next_cursor}
+
 @frappe.whitelist()
-def search_products(query, limit=20):
+@timed_endpoint
+@recorded_endpoint
+def search_products(query, limit=20, mode=None):
     """
     Search products by name or code with performance optimizations
+
+    With `mode="fulltext"` (or `searchitem_search_mode` set to "fulltext" in
+    site config) results are ranked by FULLTEXT relevance instead; this falls
+    back to the default search when the index is missing.
     """
     try:
         if not query or len(query) < 2:
@@ -46,42 +140,26 @@ def search_products(query, limit=20):
         clean_query = query.strip()
         
         # Debug logging
-        frappe.logger().debug(f"Searching for query: '{clean_query}'")
+        trace("search_products.query", query=clean_query)
+        
+        if (mode or frappe.conf.get("searchitem_search_mode")) == "fulltext":
+            products = search_items_fulltext(clean_query, PRODUCT_FIELDS, limit)
+            if products is not None:
+                for product in products:
+                    del product["relevance"]
+                resolve_image_urls(products)
+                apply_prices(products)
+                return products
+            trace("search_products.fulltext_unavailable", query=clean_query)
         
         # Use optimized search query - search in both name and code separately
         # This is more reliable than or_filters
-        name_products = frappe.get_all(
-            "Item",
-            fields=[
-                "name", "item_name", "item_code", "description", 
-                "standard_rate", "image", "item_group", "stock_uom"
-            ],
-            filters=[
-                ["disabled", "=", 0],
-                ["is_stock_item", "=", 1],
-                ["item_name", "like", f"%{clean_query}%"]
-            ],
-            limit=limit//2,
-            order_by="modified desc"
-        )
+        name_products = get_substring_matches("item_name", clean_query, limit=limit//2)
         
-        code_products = frappe.get_all(
-            "Item",
-            fields=[
-                "name", "item_name", "item_code", "description", 
-                "standard_rate", "image", "item_group", "stock_uom"
-            ],
-            filters=[
-                ["disabled", "=", 0],
-                ["is_stock_item", "=", 1],
-                ["item_code", "like", f"%{clean_query}%"]
-            ],
-            limit=limit//2,
-            order_by="modified desc"
-        )
+        code_products = get_substring_matches("item_code", clean_query, limit=limit//2)
         
         # Debug logging
-        frappe.logger().debug(f"Found {len(name_products)} products by name, {len(code_products)} by code")
+        trace("search_products.matches", by_name=len(name_products), by_code=len(code_products))
         
         # Combine and deduplicate results
         all_products = name_products + code_products
@@ -97,15 +175,15 @@ def search_products(query, limit=20):
         products = unique_products[:limit]
         
         # Debug logging for products with images
-        image_products = [p for p in products if p.image]
-        frappe.logger().debug(f"Total products found: {len(products)}, Products with images: {len(image_products)}")
+        trace(
+            "search_products.results",
+            count=len(products),
+            with_images=lambda: sum(1 for p in products if p.image)
+        )
         
-        # Add image URLs safely
-        for product in products:
-            original_image = product.image
-            product.image = get_safe_image_url(product.image)
-            if original_image and not product.image:
-                frappe.logger().debug(f"Failed to get URL for image: {original_image}")
+        # Add image URLs and price list rates safely
+        resolve_image_urls(products)
+        apply_prices(products)
         
         return products
         
@@ -114,9 +192,14 @@ def search_products(query, limit=20):
         return []
 
 @frappe.whitelist()
-def get_product_by_code(item_code):
+@timed_endpoint
+@recorded_endpoint
+def get_product_by_code(item_code, include_details=0):
     """
     Get product by specific item code with performance optimizations
+
+    With `include_details=1` an unambiguous match also carries the full
+    `get_product_details` payload under `details`.
     """
     try:
         if not item_code:
@@ -125,7 +208,7 @@ def get_product_by_code(item_code):
         clean_item_code = item_code.strip()
         
         # Debug logging
-        frappe.logger().debug(f"Searching for item code: '{clean_item_code}'")
+        trace("get_product_by_code.query", item_code=clean_item_code)
         
         # Search for exact item code match first
         products = frappe.get_all(
@@ -144,39 +227,17 @@ def get_product_by_code(item_code):
         
         # If no exact match, try partial match
         if not products:
-            products = frappe.get_all(
-                "Item",
-                fields=[
-                    "name", "item_name", "item_code", "description", 
-                    "standard_rate", "image", "item_group", "stock_uom"
-                ],
-                filters=[
-                    ["disabled", "=", 0],
-                    ["is_stock_item", "=", 1],
-                    ["item_code", "like", f"%{clean_item_code}%"]
-                ],
-                limit=5
-            )
+            products = get_substring_matches("item_code", clean_item_code, limit=5)
         
         # Debug logging
-        frappe.logger().debug(f"Found {len(products)} products for item code '{clean_item_code}'")
+        trace("get_product_by_code.matches", item_code=clean_item_code, count=len(products))
         
-        # Add image URLs safely
-        for product in products:
-            original_image = product.image
-            frappe.logger().debug(f"Processing product '{product.name}' with original image: '{original_image}'")
-            
-            # Check if original image field has data
-            if original_image:
-                frappe.logger().debug(f"Original image field type: {type(original_image)}, value: '{original_image}'")
-            
-            product.image = get_safe_image_url(product.image)
-            frappe.logger().debug(f"Processed image URL: '{product.image}'")
-            
-            if original_image and not product.image:
-                frappe.logger().debug(f"Failed to get URL for image: {original_image}")
-            elif original_image and product.image:
-                frappe.logger().debug(f"Successfully processed image: {original_image} -> {product.image}")
+        # Add image URLs and price list rates safely
+        resolve_image_urls(products)
+        apply_prices(products)
+        
+        if cint(include_details):
+            attach_details(products)
         
         return products
         
@@ -184,89 +245,227 @@ def get_product_by_code(item_code):
         frappe.log_error(f"Searchitem Item Code Error: {str(e)}", "Searchitem API")
         return []
 
+# Item columns needed by the product detail view
+DETAIL_FIELDS = [
+    "name", "item_name", "item_code", "description", "standard_rate", "image",
+    "item_group", "stock_uom", "brand", "weight_per_unit", "weight_uom", "disabled",
+    "is_stock_item", "allow_alternative_item", "is_fixed_asset", "auto_create_assets",
+    "asset_category", "asset_naming_series", "over_delivery_receipt_allowance",
+    "over_billing_allowance"
+]
+
 @frappe.whitelist()
-def get_product_details(product_id):
+@timed_endpoint
+@recorded_endpoint
+@coalesced
+def get_product_details(product_id, include_warehouses=0):
     """
     Get detailed product information for modal display
+
+    Only the projected Item columns are read, and stock is summed over every
+    warehouse. Pass `include_warehouses=1` for a per-warehouse breakdown.
     """
     try:
-        if not product_id:
-            return None
+        return load_product_details(product_id, include_warehouses)
         
-        # Debug logging
-        frappe.logger().debug(f"Getting details for product: '{product_id}'")
+    except Exception as e:
+        frappe.log_error(f"Searchitem Product Details Error: {str(e)}", "Searchitem API")
+        return None
+
+def load_product_details(product_id, include_warehouses=0):
+    """
+    Build the `get_product_details` payload for an Item name, or None when
+    it does not exist or is disabled
+    """
+    if not product_id:
+        return None
+    
+    # Debug logging
+    trace("get_product_details.query", product_id=product_id)
+    
+    # Get detailed product information
+    product = frappe.db.get_value("Item", product_id, DETAIL_FIELDS, as_dict=True)
+    
+    if not product or product.disabled:
+        trace("get_product_details.not_found", product_id=product_id)
+        return None
+    
+    # Get stock quantity summed over all Bins
+    stock_qty = 0
+    warehouses = []
+    try:
+        stock = get_stock_summary(
+            [product.item_code], by_warehouse=cint(include_warehouses)
+        ).get(product.item_code, {})
+        stock_qty = stock.get("stock_qty", 0)
+        warehouses = stock.get("warehouses", [])
+    except Exception as e:
+        trace("get_product_details.stock_error", product_id=product_id, error=e)
+    
+    # Debug logging for image
+    trace("get_product_details.image", product_id=product_id, image=product.image)
+    
+    # Get additional details
+    product.image = get_safe_image_url(product.image)
+    add_thumbnail_urls([product])
+    apply_prices([product])
+    details = build_product_details(product, stock_qty)
+    
+    if cint(include_warehouses):
+        details["warehouses"] = warehouses
+    
+    return details
+
+def attach_details(products):
+    """
+    Embed the detail payload in the top result when it is the only match,
+    saving clients the follow-up `get_product_details` call
+    """
+    if len(products) != 1:
+        return products
+    
+    try:
+        products[0]["details"] = load_product_details(products[0].name)
+    except Exception as e:
+        trace("attach_details.error", product_id=products[0].name, error=e)
+    return products
+
+def build_product_details(product, stock_qty):
+    """
+    Build the detail payload from a row holding DETAIL_FIELDS, with its image
+    and thumbnails already resolved and its price applied by `apply_prices`
+    """
+    return {
+        "name": product.name,
+        "item_name": product.item_name,
+        "item_code": product.item_code,
+        "description": product.description,
+        "standard_rate": product.standard_rate,
+        "rate": product.rate,
+        "price_list": product.price_list,
+        "image": product.image,
+        "thumbnails": product.thumbnails,
+        "item_group": product.item_group,
+        "stock_uom": product.stock_uom,
+        "brand": product.brand,
+        "weight_per_unit": product.weight_per_unit,
+        "weight_uom": product.weight_uom,
+        "stock_qty": stock_qty,
+        "is_stock_item": product.is_stock_item,
+        "allow_alternative_item": product.allow_alternative_item,
+        "is_fixed_asset": product.is_fixed_asset,
+        "auto_create_assets": product.auto_create_assets,
+        "asset_category": product.asset_category,
+        "asset_naming_series": product.asset_naming_series,
+        "over_delivery_receipt_allowance": product.over_delivery_receipt_allowance,
+        "over_billing_allowance": product.over_billing_allowance
+    }
+
+# Upper bound on codes accepted by a single bulk scan call
+BULK_SCAN_LIMIT = 500
+
+@frappe.whitelist()
+@timed_endpoint
+@recorded_endpoint
+def scan_products_bulk(codes, include_warehouses=0):
+    """
+    Resolve a burst of scanned barcodes or item codes in one call
+
+    Uses a constant number of queries regardless of the number of codes:
+    one barcode IN lookup, one item_code IN lookup and one Bin aggregation.
+    Each input is matched by barcode first, then by exact item code, both
+    case-insensitively like the IN lookups, and the results are returned in
+    input order as
+    `{"query", "search_method", "product"}` with `product` set to the same
+    payload as `get_product_details` (None when nothing matched).
+    """
+    try:
+        codes = frappe.parse_json(codes) if isinstance(codes, str) else codes
+        # A single code may arrive bare, and JSON-parse to a number
+        if codes is not None and not isinstance(codes, (list, tuple)):
+            codes = [codes]
+        if not codes:
+            return []
         
-        # Get detailed product information
-        product = frappe.get_doc("Item", product_id)
+        if len(codes) > BULK_SCAN_LIMIT:
+            frappe.throw(_("Cannot scan more than {0} codes at once").format(BULK_SCAN_LIMIT))
         
-        if not product or product.disabled:
-            frappe.logger().debug(f"Product '{product_id}' not found or disabled")
-            return None
+        queries = [str(code or "").strip() for code in codes]
+        lookup = [q for q in set(queries) if q]
+        if not lookup:
+            return [{"query": q, "search_method": None, "product": None} for q in queries]
         
-        # Get stock quantity from Bin
-        stock_qty = 0
-        try:
-            bin_data = frappe.get_all(
-                "Bin",
-                fields=["actual_qty"],
-                filters={"item_code": product.item_code},
-                limit=1
-            )
-            if bin_data:
-                stock_qty = bin_data[0].actual_qty or 0
-        except:
-            pass
-        
-        # Debug logging for image
-        if product.image:
-            frappe.logger().debug(f"Product '{product_id}' has image: {product.image}")
-        
-        # Get additional details
-        details = {
-            "name": product.name,
-            "item_name": product.item_name,
-            "item_code": product.item_code,
-            "description": product.description,
-            "standard_rate": product.standard_rate,
-            "image": get_safe_image_url(product.image),
-            "item_group": product.item_group,
-            "stock_uom": product.stock_uom,
-            "brand": product.brand,
-            "weight_per_unit": product.weight_per_unit,
-            "weight_uom": product.weight_uom,
-            "stock_qty": stock_qty,
-            "is_stock_item": product.is_stock_item,
-            "allow_alternative_item": product.allow_alternative_item,
-            "is_fixed_asset": product.is_fixed_asset,
-            "auto_create_assets": product.auto_create_assets,
-            "asset_category": product.asset_category,
-            "asset_naming_series": product.asset_naming_series,
-            "over_delivery_receipt_allowance": product.over_delivery_receipt_allowance,
-            "over_billing_allowance": product.over_billing_allowance
-        }
+        # Step 1: barcode -> item code for every input at once. The IN
+        # lookups match case-insensitively, so both maps are keyed by
+        # casefolded codes.
+        barcode_map = {}
+        for row in frappe.get_all(
+            "Item Barcode",
+            fields=["barcode", "parent"],
+            filters={"barcode": ["in", lookup], "parenttype": "Item"},
+        ):
+            barcode_map.setdefault(row.barcode.casefold(), row.parent)
+        
+        # Step 2: fetch every candidate item at once
+        candidate_codes = set(lookup) | set(barcode_map.values())
+        items = frappe.get_all(
+            "Item",
+            fields=DETAIL_FIELDS,
+            filters=[
+                ["disabled", "=", 0],
+                ["is_stock_item", "=", 1],
+                ["item_code", "in", list(candidate_codes)]
+            ],
+        )
+        resolve_image_urls(items)
+        apply_prices(items)
+        items_by_code = {item.item_code.casefold(): item for item in items}
+        
+        # Step 3: one Bin aggregation for every matched item
+        stock = get_stock_summary(
+            [item.item_code for item in items], by_warehouse=cint(include_warehouses)
+        )
+        
+        results = []
+        for query in queries:
+            item, search_method = None, None
+            key = query.casefold()
+            parent = barcode_map.get(key)
+            if parent is not None and parent.casefold() in items_by_code:
+                item, search_method = items_by_code[parent.casefold()], "barcode"
+            elif key in items_by_code:
+                item, search_method = items_by_code[key], "item_code_exact"
+            
+            product = None
+            if item:
+                item_stock = stock.get(item.item_code, {})
+                product = build_product_details(item, item_stock.get("stock_qty", 0))
+                if cint(include_warehouses):
+                    product["warehouses"] = item_stock.get("warehouses", [])
+            
+            results.append({"query": query, "search_method": search_method, "product": product})
         
-        return details
+        return results
         
+    except frappe.ValidationError:
+        raise
     except Exception as e:
-        frappe.log_error(f"Searchitem Product Details Error: {str(e)}", "Searchitem API")
-        return None
+        frappe.log_error(f"Searchitem Bulk Scan Error: {str(e)}", "Searchitem API")
+        return []
 
 @frappe.whitelist()
+@timed_endpoint
+@recorded_endpoint
 def get_product_by_barcode(barcode):
     """
     Get product by barcode with performance optimizations
     """
     try:
-        # Search in Item Barcode doctype first
-        barcode_doc = frappe.get_all(
-            "Item Barcode",
-            fields=["parent"],
-            filters={"barcode": barcode},
-            limit=1
-        )
+        # Search in the cached Item Barcode map first
+        barcode_parents = get_barcode_parents(barcode)
         
-        if barcode_doc:
-            item_code = barcode_doc[0].parent
+        if barcode_parents:
+            item_code = barcode_parents[0]
         else:
             # Fallback to item_code
             item_code = barcode
@@ -287,6 +486,8 @@ def get_product_by_barcode(barcode):
             "item_group": item.item_group,
             "stock_uom": item.stock_uom
         }
+        add_thumbnail_urls([product])
+        apply_prices([product])
         
         return product
         
@@ -295,160 +496,263 @@ def get_product_by_barcode(barcode):
         return None
 
 @frappe.whitelist()
-def search_product_unified(query):
+@timed_endpoint
+@recorded_endpoint
+@coalesced
+def search_product_unified(query, ranked=None, include_details=0):
     """
     Unified search that tries barcode first, then item code, then item name
     Priority: Barcode -> Item Code -> Item Name
+
+    When `ranked` is set (or `searchitem_ranked_search` is enabled in site config)
+    all four tiers are resolved in a single ranked SQL statement instead.
+    With `include_details=1` an unambiguous match also carries the full
+    `get_product_details` payload under `details`.
+    """
+    products = find_unified_matches(query, ranked)
+    apply_prices(products)
+    if cint(include_details):
+        attach_details(products)
+    return products
+
+def find_unified_matches(query, ranked=None):
+    """
+    Run the unified search tiers, see `search_product_unified`
     """
     try:
         if not query or not query.strip():
             return []
         
         clean_query = query.strip()
-        frappe.logger().debug(f"Unified search for: '{clean_query}'")
+        trace("unified.query", query=clean_query)
         
-        # Step 1: Try barcode search first
-        try:
-            # Search in Item Barcode doctype
-            barcode_docs = frappe.get_all(
-                "Item Barcode",
-                fields=["parent"],
-                filters={"barcode": clean_query},
-                limit=5
-            )
-            
-            if barcode_docs:
-                frappe.logger().debug(f"Found {len(barcode_docs)} items by barcode")
-                # Get items from barcode matches
-                item_codes = [doc.parent for doc in barcode_docs]
-                products = frappe.get_all(
-                    "Item",
-                    fields=[
-                        "name", "item_name", "item_code", "description", 
-                        "standard_rate", "image", "item_group", "stock_uom"
-                    ],
-                    filters=[
-                        ["disabled", "=", 0],
-                        ["is_stock_item", "=", 1],
-                        ["item_code", "in", item_codes]
-                    ],
-                    limit=5
-                )
+        if ranked is None:
+            ranked = frappe.conf.get("searchitem_ranked_search")
+        
+        unknown_scan = is_unknown_scan(clean_query)
+        if unknown_scan:
+            trace("unified.unknown_scan", query=clean_query)
+            if skips_substring_tiers():
+                increment(RESULTS_TOTAL, "miss")
+                return []
+        
+        if cint(ranked):
+            return search_product_ranked(clean_query, unknown_scan=unknown_scan)
+        
+        # Scanner-shaped codes the filter has never seen cannot match a
+        # barcode or an exact item code
+        if not unknown_scan:
+            # Step 1: Try barcode search first
+            try:
+                with timer(TIER_SECONDS, "barcode"):
+                    # Search in the cached Item Barcode map
+                    item_codes = get_barcode_parents(clean_query)
+                    products = []
                 
+                    if item_codes:
+                        trace("unified.barcode_parents", item_codes=item_codes)
+                        # Get items from barcode matches
+                        products = frappe.get_all(
+                            "Item",
+                            fields=[
+                                "name", "item_name", "item_code", "description", 
+                                "standard_rate", "image", "item_group", "stock_uom"
+                            ],
+                            filters=[
+                                ["disabled", "=", 0],
+                                ["is_stock_item", "=", 1],
+                                ["item_code", "in", item_codes]
+                            ],
+                            limit=5
+                        )
+            
                 if products:
                     # Process images and return results
+                    resolve_image_urls(products)
                     for product in products:
-                        original_image = product.image
-                        product.image = get_safe_image_url(product.image)
                         product.search_method = "barcode"  # Add search method for debugging
-                        frappe.logger().debug(f"Found by barcode: {product.item_code}")
-                    
-                    frappe.logger().debug(f"Returning {len(products)} products found by barcode")
+                
+                    increment(RESULTS_TOTAL, "barcode")
+                    trace("unified.matched", tier="barcode", item_codes=lambda: [p.item_code for p in products])
                     return products
                     
-        except Exception as e:
-            frappe.logger().debug(f"Barcode search error: {str(e)}")
+            except Exception as e:
+                trace("unified.tier_error", tier="barcode", error=e)
         
-        # Step 2: Try exact item code match
-        try:
-            products = frappe.get_all(
-                "Item",
-                fields=[
-                    "name", "item_name", "item_code", "description", 
-                    "standard_rate", "image", "item_group", "stock_uom"
-                ],
-                filters=[
-                    ["disabled", "=", 0],
-                    ["is_stock_item", "=", 1],
-                    ["item_code", "=", clean_query]
-                ],
-                limit=5
-            )
+            # Step 2: Try exact item code match
+            try:
+                with timer(TIER_SECONDS, "item_code_exact"):
+                    products = frappe.get_all(
+                        "Item",
+                        fields=[
+                            "name", "item_name", "item_code", "description", 
+                            "standard_rate", "image", "item_group", "stock_uom"
+                        ],
+                        filters=[
+                            ["disabled", "=", 0],
+                            ["is_stock_item", "=", 1],
+                            ["item_code", "=", clean_query]
+                        ],
+                        limit=5
+                    )
             
-            if products:
-                frappe.logger().debug(f"Found {len(products)} items by exact item code")
-                for product in products:
-                    original_image = product.image
-                    product.image = get_safe_image_url(product.image)
-                    product.search_method = "item_code_exact"
-                    frappe.logger().debug(f"Found by item code: {product.item_code}")
+                if products:
+                    resolve_image_urls(products)
+                    for product in products:
+                        product.search_method = "item_code_exact"
                 
-                frappe.logger().debug(f"Returning {len(products)} products found by item code")
-                return products
+                    increment(RESULTS_TOTAL, "item_code_exact")
+                    trace("unified.matched", tier="item_code_exact", item_codes=lambda: [p.item_code for p in products])
+                    return products
                 
-        except Exception as e:
-            frappe.logger().debug(f"Item code search error: {str(e)}")
+            except Exception as e:
+                trace("unified.tier_error", tier="item_code_exact", error=e)
         
         # Step 3: Try partial item code match
         try:
-            products = frappe.get_all(
-                "Item",
-                fields=[
-                    "name", "item_name", "item_code", "description", 
-                    "standard_rate", "image", "item_group", "stock_uom"
-                ],
-                filters=[
-                    ["disabled", "=", 0],
-                    ["is_stock_item", "=", 1],
-                    ["item_code", "like", f"%{clean_query}%"]
-                ],
-                limit=5
-            )
+            with timer(TIER_SECONDS, "item_code_partial"):
+                products = get_substring_matches("item_code", clean_query, limit=5)
             
             if products:
-                frappe.logger().debug(f"Found {len(products)} items by partial item code")
+                resolve_image_urls(products)
                 for product in products:
-                    original_image = product.image
-                    product.image = get_safe_image_url(product.image)
                     product.search_method = "item_code_partial"
-                    frappe.logger().debug(f"Found by partial item code: {product.item_code}")
                 
-                frappe.logger().debug(f"Returning {len(products)} products found by partial item code")
+                increment(RESULTS_TOTAL, "item_code_partial")
+                trace("unified.matched", tier="item_code_partial", item_codes=lambda: [p.item_code for p in products])
                 return products
                 
         except Exception as e:
-            frappe.logger().debug(f"Partial item code search error: {str(e)}")
+            trace("unified.tier_error", tier="item_code_partial", error=e)
         
         # Step 4: Try item name search
         try:
-            products = frappe.get_all(
-                "Item",
-                fields=[
-                    "name", "item_name", "item_code", "description", 
-                    "standard_rate", "image", "item_group", "stock_uom"
-                ],
-                filters=[
-                    ["disabled", "=", 0],
-                    ["is_stock_item", "=", 1],
-                    ["item_name", "like", f"%{clean_query}%"]
-                ],
-                limit=5
-            )
+            with timer(TIER_SECONDS, "item_name"):
+                products = get_substring_matches("item_name", clean_query, limit=5)
             
             if products:
-                frappe.logger().debug(f"Found {len(products)} items by item name")
+                resolve_image_urls(products)
                 for product in products:
-                    original_image = product.image
-                    product.image = get_safe_image_url(product.image)
                     product.search_method = "item_name"
-                    frappe.logger().debug(f"Found by item name: {product.item_name}")
                 
-                frappe.logger().debug(f"Returning {len(products)} products found by item name")
+                increment(RESULTS_TOTAL, "item_name")
+                trace("unified.matched", tier="item_name", item_codes=lambda: [p.item_code for p in products])
                 return products
                 
         except Exception as e:
-            frappe.logger().debug(f"Item name search error: {str(e)}")
+            trace("unified.tier_error", tier="item_name", error=e)
         
         # No results found
-        frappe.logger().debug(f"No products found for query: '{clean_query}'")
+        increment(RESULTS_TOTAL, "miss")
+        trace("unified.miss", query=clean_query)
         return []
         
     except Exception as e:
         frappe.log_error(f"Searchitem Unified Search Error: {str(e)}", "Searchitem API")
-        frappe.logger().debug(f"Unified search error: {str(e)}")
+        trace("unified.error", query=query, error=e)
         return []
 
+def search_product_ranked(clean_query, limit=5, unknown_scan=False):
+    """
+    Resolve every unified search tier in one round trip.
+
+    Each tier is its own UNION ALL branch so the barcode and exact code
+    branches keep using their indexes; only the rows of the best tier
+    that matched are returned, in the same order the step-by-step search
+    would have produced them.
+
+    The substring branches are guarded by an uncorrelated NOT EXISTS on the
+    barcode and exact code tiers. MariaDB evaluates it once while
+    optimizing, so on a barcode or exact hit those branches become an
+    impossible WHERE instead of two full table scans. With `unknown_scan`
+    (the Bloom filter ruled out a barcode or item code) the barcode and
+    exact branches and the guards are left out.
+    """
+    like_query = f"%{clean_query}%"
+    exact_branches = ""
+    exact_miss = ""
+    if not unknown_scan:
+        exact_branches = """
+            (select 1 as tier, item.name, item.item_name, item.item_code, item.description,
+                item.standard_rate, item.image, item.item_group, item.stock_uom, item.modified
+            from `tabItem` item
+            where item.disabled = 0 and item.is_stock_item = 1
+                and item.item_code in (
+                    select barcode.parent from (
+                        select parent from `tabItem Barcode`
+                        where barcode = %(query)s and parenttype = 'Item'
+                        limit %(limit)s
+                    ) barcode
+                )
+            order by item.modified desc limit %(limit)s)
+            union all
+            (select 2 as tier, name, item_name, item_code, description,
+                standard_rate, image, item_group, stock_uom, modified
+            from `tabItem`
+            where disabled = 0 and is_stock_item = 1 and item_code = %(query)s
+            order by modified desc limit %(limit)s)
+            union all"""
+        exact_miss = """
+                and not exists (
+                    select 1 from `tabItem Barcode` barcode
+                    join `tabItem` barcode_item on barcode_item.item_code = barcode.parent
+                    where barcode.barcode = %(query)s and barcode.parenttype = 'Item'
+                        and barcode_item.disabled = 0 and barcode_item.is_stock_item = 1
+                )
+                and not exists (
+                    select 1 from `tabItem` exact
+                    where exact.item_code = %(query)s and exact.disabled = 0 and exact.is_stock_item = 1
+                )"""
+    with timer(TIER_SECONDS, "ranked"):
+        rows = frappe.db.sql(
+            f"""{exact_branches}
+            (select 3 as tier, name, item_name, item_code, description,
+                standard_rate, image, item_group, stock_uom, modified
+            from `tabItem`
+            where disabled = 0 and is_stock_item = 1 and item_code like %(like_query)s
+                {exact_miss}
+            order by modified desc limit %(limit)s)
+            union all
+            (select 4 as tier, name, item_name, item_code, description,
+                standard_rate, image, item_group, stock_uom, modified
+            from `tabItem`
+            where disabled = 0 and is_stock_item = 1 and item_name like %(like_query)s
+                {exact_miss}
+            order by modified desc limit %(limit)s)
+            order by tier, modified desc
+            """,
+            {"query": clean_query, "like_query": like_query, "limit": cint(limit)},
+            as_dict=True,
+        )
+    
+    if not rows:
+        increment(RESULTS_TOTAL, "miss")
+        trace("unified.miss", query=clean_query)
+        return []
+    
+    best_tier = rows[0].tier
+    products = []
+    for row in rows:
+        if row.tier != best_tier:
+            break
+        row.search_method = SEARCH_TIERS[best_tier - 1]
+        del row["tier"]
+        del row["modified"]
+        products.append(row)
+    
+    resolve_image_urls(products)
+    increment(RESULTS_TOTAL, SEARCH_TIERS[best_tier - 1])
+    trace(
+        "unified.matched",
+        tier=SEARCH_TIERS[best_tier - 1],
+        ranked=True,
+        item_codes=lambda: [p.item_code for p in products]
+    )
+    return products
+
 @frappe.whitelist()
+@timed_endpoint
+@recorded_endpoint
 def diagnose_image_issue(item_code=None):
     """
     Diagnostic function to help identify image issues
@@ -528,9 +832,14 @@ def diagnose_image_issue(item_code=None):
         return {"error": str(e)}
 
 @frappe.whitelist()
+@timed_endpoint
+@recorded_endpoint
 def test_unified_search(query):
     """
     Test the unified search functionality with detailed logging
+
+    For performance triage use the slow request recorder instead, see
+    `searchitem.api.slowlog.get_slow_requests`.
     """
     try:
         if not query:
@@ -689,9 +998,14 @@ def test_unified_search(query):
         return {"error": str(e)}
 
 @frappe.whitelist()
+@timed_endpoint
+@recorded_endpoint
 def diagnose_search_issue(query):
     """
     Diagnostic function to help identify search issues
+
+    For performance triage use the slow request recorder instead, see
+    `searchitem.api.slowlog.get_slow_requests`.
     """
     try:
         if not query:
@@ -748,9 +1062,74 @@ def diagnose_search_issue(query):
         frappe.log_error(f"Diagnosis Error: {str(e)}", "Searchitem API")
         return {"error": str(e)}
 
-def get_safe_image_url(image_field):
+# Item columns returned by listing and search endpoints
+PRODUCT_FIELDS = [
+    "name", "item_name", "item_code", "description",
+    "standard_rate", "image", "item_group", "stock_uom"
+]
+
+def get_substring_matches(field, query, limit):
+    """
+    Find active stock items whose `field` contains `query`, newest first
+
+    Served from the in-memory trigram index when it is enabled and the query
+    is long enough, otherwise falls back to `LIKE '%query%'`.
+    """
+    candidates = find_substring_candidates(query, field)
+    if candidates is None:
+        condition = [field, "like", f"%{query}%"]
+    elif not candidates:
+        return []
+    else:
+        condition = ["name", "in", candidates]
+    
+    return frappe.get_all(
+        "Item",
+        fields=PRODUCT_FIELDS,
+        filters=[
+            ["disabled", "=", 0],
+            ["is_stock_item", "=", 1],
+            condition
+        ],
+        limit=limit,
+        order_by="modified desc"
+    )
+
+def resolve_image_urls(products, field="image", thumbnails=True):
+    """
+    Replace the image field of every product with its safe URL, resolving
+    all File references of the page with a single lookup. Unless
+    `thumbnails` is off, `thumbnails` is set to the derivative URLs too.
+    """
+    file_names = [
+        product.get(field) for product in products
+        if is_file_reference(product.get(field))
+    ]
+    file_urls = get_file_urls(file_names) if file_names else {}
+    
+    for product in products:
+        original_image = product.get(field)
+        product[field] = get_safe_image_url(original_image, file_urls=file_urls)
+        if original_image and not product[field]:
+            trace("image.unresolved", image=original_image)
+    
+    if thumbnails:
+        add_thumbnail_urls(products, field)
+    
+    return products
+
+def is_file_reference(image_field):
+    """
+    Check if the image field may hold a File doctype name rather than a path
+    """
+    return bool(image_field) and not image_field.startswith(('/', 'http', '\\'))
+
+def get_safe_image_url(image_field, file_urls=None):
     """
     Safely get image URL with error handling
+
+    `file_urls` maps File names to file URLs, as returned by
+    `searchitem.api.cache.get_file_urls`; it is looked up when not given.
     """
     try:
         if not image_field:
@@ -769,27 +1148,26 @@ def get_safe_image_url(image_field):
             # For file paths, use frappe.utils.get_url to get the full URL
             from frappe.utils import get_url
             url = get_url() + image_field
-            frappe.logger().debug(f"Generated URL for file path '{image_field}': {url}")
+            trace("image.file_path", image=image_field, url=url)
             return url
             
         # Handle File doctype references (when image field contains File name)
-        if not image_field.startswith('/') and not image_field.startswith('http'):
+        if is_file_reference(image_field):
             try:
                 # Check if this is a File doctype name
-                file_doc = frappe.get_doc("File", image_field)
-                if file_doc and file_doc.file_url:
+                if file_urls is None:
+                    file_urls = get_file_urls([image_field])
+                file_url = file_urls.get(image_field)
+                if file_url:
                     from frappe.utils import get_url
-                    if file_doc.file_url.startswith('http'):
-                        return file_doc.file_url
+                    if file_url.startswith('http'):
+                        return file_url
                     else:
-                        url = get_url() + file_doc.file_url
-                        frappe.logger().debug(f"Generated URL from File doc '{image_field}': {url}")
+                        url = get_url() + file_url
+                        trace("image.file_doc", image=image_field, url=url)
                         return url
-            except frappe.DoesNotExistError:
-                # Not a File doctype name, continue with other logic
-                pass
             except Exception as e:
-                frappe.logger().debug(f"Error checking File doctype for '{image_field}': {str(e)}")
+                trace("image.file_doc_error", image=image_field, error=e)
                 pass
         
         # For other cases, try to construct the URL
@@ -801,11 +1179,11 @@ def get_safe_image_url(image_field):
             # If it contains path separators, use as-is with base URL
             url = frappe.utils.get_url() + ('/' + image_field if not image_field.startswith('/') else image_field)
         
-        frappe.logger().debug(f"Generated URL for image '{image_field}': {url}")
+        trace("image.constructed", image=image_field, url=url)
         return url
         
     except Exception as e:
         # Log error but don't break the search
         frappe.log_error(f"Image URL Error for '{image_field}': {str(e)}", "Searchitem API")
-        frappe.logger().debug(f"Failed to process image field: '{image_field}', error: {str(e)}")
+        trace("image.error", image=image_field, error=e)
         return None
@@ -0,0 +1,162 @@
+# Search item slow request recorder
+import functools
+import inspect
+import time
+
+import frappe
+from frappe.utils import cint, flt, now
+
+from searchitem.api.trace import trace
+
+SLOW_REQUESTS_KEY = "searchitem_slow_requests"
+# Statements kept per recorded request
+MAX_STATEMENTS = 50
+
+
+def get_threshold_ms():
+    """Slow request threshold from site config; 0 disables recording"""
+    return flt(frappe.conf.get("searchitem_slow_request_ms"))
+
+
+def get_capacity():
+    return cint(frappe.conf.get("searchitem_slow_request_capacity")) or 100
+
+
+class StatementRecorder:
+    """Wrap frappe.db.sql for the duration of a call and time each statement"""
+
+    def __init__(self):
+        self.statements = []
+        self.original_sql = None
+
+    def __enter__(self):
+        self.original_sql = frappe.db.sql
+        original_sql = self.original_sql
+        statements = self.statements
+
+        def recording_sql(query, values=(), *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original_sql(query, values, *args, **kwargs)
+            finally:
+                if len(statements) < MAX_STATEMENTS:
+                    statements.append(
+                        {
+                            "query": str(query).strip(),
+                            "values": values,
+                            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                        }
+                    )
+
+        frappe.db.sql = recording_sql
+        return self
+
+    def __exit__(self, *exc):
+        frappe.db.sql = self.original_sql
+
+
+def explain(statement):
+    """EXPLAIN a recorded SELECT, returning None for other statements"""
+    if not statement["query"].lower().lstrip("(").startswith("select"):
+        return None
+    try:
+        return frappe.db.sql(f"explain {statement['query']}", statement["values"] or (), as_dict=True)
+    except Exception as e:
+        return str(e)
+
+
+def _search_tier(result):
+    if isinstance(result, list):
+        if not result:
+            return "miss"
+        first = result[0]
+        if isinstance(first, dict):
+            return first.get("search_method")
+    return None
+
+
+def save_slow_request(endpoint, kwargs, duration_ms, statements, result):
+    entry = {
+        "endpoint": endpoint,
+        "args": {key: value for key, value in kwargs.items() if key != "cmd"},
+        "user": frappe.session.user,
+        "timestamp": now(),
+        "duration_ms": round(duration_ms, 3),
+        "search_tier": _search_tier(result),
+        "sql_ms": round(sum(statement["duration_ms"] for statement in statements), 3),
+        "statements": [
+            {
+                "query": statement["query"],
+                "values": statement["values"],
+                "duration_ms": statement["duration_ms"],
+                "explain": explain(statement),
+            }
+            for statement in statements
+        ],
+    }
+
+    cache = frappe.cache()
+    cache.lpush(SLOW_REQUESTS_KEY, frappe.as_json(entry))
+    cache.ltrim(SLOW_REQUESTS_KEY, 0, get_capacity() - 1)
+
+
+def recorded_endpoint(fn):
+    """
+    Record the SQL issued by an endpoint call and keep it when the call is
+    slower than `searchitem_slow_request_ms`. Apply below
+    `@frappe.whitelist()`; nested endpoint calls are recorded by the
+    outermost one.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        threshold = get_threshold_ms()
+        if not threshold or getattr(frappe.local, "searchitem_recording", False):
+            return fn(*args, **kwargs)
+
+        frappe.local.searchitem_recording = True
+        try:
+            with StatementRecorder() as recorder:
+                start = time.perf_counter()
+                result = fn(*args, **kwargs)
+                duration_ms = (time.perf_counter() - start) * 1000
+        finally:
+            frappe.local.searchitem_recording = False
+
+        if duration_ms >= threshold:
+            try:
+                call_args = inspect.signature(fn).bind_partial(*args, **kwargs).arguments
+                save_slow_request(fn.__name__, call_args, duration_ms, recorder.statements, result)
+            except Exception as e:
+                trace("slowlog.record_error", endpoint=fn.__name__, error=e)
+
+        return result
+
+    # Keep the original signature so that frappe only passes known arguments
+    wrapper.__signature__ = inspect.signature(fn)
+    return wrapper
+
+
+@frappe.whitelist()
+def get_slow_requests(limit=20, endpoint=None):
+    """
+    Return the most recent slow searchitem requests, newest first
+    """
+    frappe.only_for("System Manager")
+
+    entries = [
+        frappe.parse_json(frappe.safe_decode(entry))
+        for entry in frappe.cache().lrange(SLOW_REQUESTS_KEY, 0, get_capacity() - 1)
+    ]
+    if endpoint:
+        entries = [entry for entry in entries if entry.get("endpoint") == endpoint]
+    return entries[: cint(limit) or 20]
+
+
+@frappe.whitelist(methods=["POST"])
+def clear_slow_requests():
+    """
+    Empty the slow request buffer
+    """
+    frappe.only_for("System Manager")
+    frappe.cache().delete_value(SLOW_REQUESTS_KEY)
@@ -0,0 +1,189 @@
+# Search item stock helpers
+import pickle
+import time
+
+import frappe
+from frappe.utils import flt
+
+from searchitem.api.trace import trace
+
+# Redis hash of item code -> {"stock_qty", "warehouses", "refreshed"}, kept
+# current from the Bin, Stock Ledger Entry and Repost Item Valuation
+# doc_events
+STOCK_SUMMARY_KEY = "searchitem_stock_summary"
+# Seconds an entry is served for. Bins are mostly updated with
+# `db.set_value`, which runs no doc_events, so this bounds how stale a
+# summary can get when no hook saw the change.
+STOCK_SUMMARY_TTL = 300
+
+
+def get_stock_summary(item_codes, by_warehouse=False):
+    """
+    Return the stock summary of a set of items.
+
+    Returns a dict keyed by item code with the total `stock_qty` across all
+    warehouses and, when `by_warehouse` is set, a `warehouses` list of
+    `{"warehouse", "actual_qty"}` rows. Items without any Bin are omitted.
+
+    Summaries are read from the materialized Redis hash with a single HMGET;
+    only items missing there, or refreshed more than STOCK_SUMMARY_TTL
+    seconds ago, are aggregated from Bin, with one query.
+    """
+    item_codes = [code for code in set(item_codes or []) if code]
+    if not item_codes:
+        return {}
+
+    entries = {}
+    missing = item_codes
+    expired = []
+    cache = frappe.cache()
+    try:
+        cached = cache.hmget(cache.make_key(STOCK_SUMMARY_KEY), item_codes)
+        missing = []
+        oldest = time.time() - STOCK_SUMMARY_TTL
+        for item_code, value in zip(item_codes, cached, strict=True):
+            entry = pickle.loads(value) if value is not None else None
+            if entry is None:
+                missing.append(item_code)
+            elif entry.get("refreshed", 0) < oldest:
+                expired.append(item_code)
+            else:
+                entries[item_code] = entry
+    except Exception as e:
+        trace("stock.cache_error", error=e)
+
+    if missing or expired:
+        aggregated = aggregate_bins(missing + expired)
+        entries.update(aggregated)
+        # Fill without overwriting, so a refresh published after a stock
+        # transaction committed wins over a read that started before it.
+        # Expired entries are replaced outright.
+        _store({code: aggregated[code] for code in missing}, overwrite=False)
+        _store({code: aggregated[code] for code in expired})
+
+    summary = {}
+    for item_code, entry in entries.items():
+        if not entry["warehouses"]:
+            continue
+        summary[item_code] = {"stock_qty": entry["stock_qty"]}
+        if by_warehouse:
+            summary[item_code]["warehouses"] = [dict(row) for row in entry["warehouses"]]
+
+    return summary
+
+
+def aggregate_bins(item_codes):
+    """
+    Aggregate Bin quantities for a set of items with a single query. Every
+    item gets an entry, with an empty `warehouses` list when it has no Bin.
+    """
+    rows = frappe.db.sql(
+        """
+        select item_code, warehouse, sum(actual_qty) as actual_qty
+        from `tabBin`
+        where item_code in %(item_codes)s
+        group by item_code, warehouse
+        order by item_code, warehouse
+        """,
+        {"item_codes": tuple(item_codes)},
+        as_dict=True,
+    )
+
+    refreshed = time.time()
+    entries = {
+        item_code: {"stock_qty": 0.0, "warehouses": [], "refreshed": refreshed} for item_code in item_codes
+    }
+    for row in rows:
+        entry = entries.setdefault(row.item_code, {"stock_qty": 0.0, "warehouses": [], "refreshed": refreshed})
+        entry["stock_qty"] += flt(row.actual_qty)
+        entry["warehouses"].append({"warehouse": row.warehouse, "actual_qty": flt(row.actual_qty)})
+
+    return entries
+
+
+def _store(entries, overwrite=True):
+    if not entries:
+        return
+
+    try:
+        cache = frappe.cache()
+        key = cache.make_key(STOCK_SUMMARY_KEY)
+        pipeline = cache.pipeline()
+        for item_code, entry in entries.items():
+            if overwrite:
+                pipeline.hset(key, item_code, pickle.dumps(entry))
+            else:
+                pipeline.hsetnx(key, item_code, pickle.dumps(entry))
+        pipeline.execute()
+    except Exception as e:
+        trace("stock.cache_error", error=e)
+
+
+def refresh_stock_summary(item_codes):
+    """Recompute and publish the summaries of `item_codes` from Bin"""
+    item_codes = [code for code in set(item_codes or []) if code]
+    if item_codes:
+        _store(aggregate_bins(item_codes))
+
+
+def clear_stock_summary():
+    """Drop every materialized summary, they are rebuilt on the next read"""
+    frappe.cache().delete_value(STOCK_SUMMARY_KEY)
+
+
+def _refresh_pending():
+    item_codes = getattr(frappe.local, "searchitem_stock_pending", None)
+    frappe.local.searchitem_stock_pending = None
+    try:
+        if item_codes and None in item_codes:
+            clear_stock_summary()
+        else:
+            refresh_stock_summary(item_codes)
+    except Exception as e:
+        frappe.log_error(f"Searchitem Stock Summary Error: {str(e)}", "Searchitem API")
+
+
+def _mark_pending(item_code):
+    """Queue `item_code` for a refresh after commit; None clears every summary"""
+    pending = getattr(frappe.local, "searchitem_stock_pending", None)
+    if pending is None:
+        pending = frappe.local.searchitem_stock_pending = set()
+        frappe.db.after_commit.add(_refresh_pending)
+        frappe.db.after_rollback.add(_discard_pending)
+    pending.add(item_code)
+
+
+def on_stock_change(doc, method=None, *args, **kwargs):
+    """
+    doc_events handler for Bin and Stock Ledger Entry changes
+
+    Bins are updated after the ledger entry is submitted, so the summary is
+    recomputed once per transaction, after it commits.
+    """
+    try:
+        _mark_pending(doc.item_code)
+    except Exception as e:
+        frappe.log_error(f"Searchitem Stock Summary Error: {str(e)}", "Searchitem API")
+
+
+def on_repost_change(doc, method=None, *args, **kwargs):
+    """
+    doc_events handler for Repost Item Valuation status changes
+
+    Reposts rewrite future ledger entries and Bins without submitting any
+    ledger entry, so once one completes the item it was for is refreshed;
+    transaction based reposts can touch any item and clear every summary.
+    """
+    try:
+        if doc.status != "Completed":
+            return
+        if doc.get("based_on") == "Item and Warehouse" and doc.get("item_code"):
+            _mark_pending(doc.item_code)
+        else:
+            _mark_pending(None)
+    except Exception as e:
+        frappe.log_error(f"Searchitem Stock Summary Error: {str(e)}", "Searchitem API")
+
+
+def _discard_pending():
+    frappe.local.searchitem_stock_pending = None
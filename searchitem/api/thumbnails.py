@@ -0,0 +1,251 @@
+# Search item image thumbnails
+import hashlib
+import os
+from urllib.parse import urlencode
+
+import frappe
+from frappe import _
+from frappe.utils import cint, get_url
+from werkzeug.wrappers import Response
+
+from searchitem.api.cache import LocalLRU, get_hash_values
+from searchitem.api.trace import trace
+
+# Bounding box sizes, in pixels, derivatives are generated at
+THUMBNAIL_SIZES = (96, 320, 800)
+
+# format: (Pillow format, mimetype)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+DEFAULT_FORMAT = "webp"
+THUMBNAIL_QUALITY = 80
+
+# Redis hash of public file_url -> content hash ("" when the file is missing)
+SOURCE_HASH_KEY = "searchitem_thumbnail_source"
+
+_source_hash_lru = LocalLRU(maxsize=4096, ttl=300)
+
+
+def get_thumbnail_dir():
+    return frappe.get_site_path("private", "searchitem_thumbnails")
+
+
+def get_source_path(file_url):
+    """Absolute path of a public `/files/...` URL, None for anything else"""
+    if not file_url or not file_url.startswith("/files/"):
+        return None
+
+    public_files = os.path.realpath(frappe.get_site_path("public", "files"))
+    path = os.path.realpath(frappe.get_site_path("public", file_url.lstrip("/")))
+    if not path.startswith(public_files + os.sep):
+        return None
+    return path
+
+
+def _hash_file(path):
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_source_hashes(file_urls):
+    """
+    Map public file URLs to the content hash of the file, see
+    `get_hash_values`. Hashes come from the `content_hash` File stores for
+    uploads, with one query; only files with no File record are hashed
+    from disk. Missing files map to "".
+    """
+    file_urls = [url for url in set(file_urls or []) if get_source_path(url)]
+    return get_hash_values(SOURCE_HASH_KEY, _source_hash_lru, file_urls, _load_source_hashes)
+
+
+def _load_source_hashes(file_urls):
+    found = dict(
+        frappe.get_all(
+            "File",
+            filters={"file_url": ["in", file_urls], "is_private": 0},
+            fields=["file_url", "content_hash"],
+            as_list=True,
+        )
+    )
+    hashes = {}
+    for url in file_urls:
+        content_hash = found.get(url)
+        if not content_hash:
+            path = get_source_path(url)
+            content_hash = _hash_file(path) if os.path.isfile(path) else ""
+        hashes[url] = content_hash
+    return hashes
+
+
+def get_thumbnail_url(file_url, content_hash, size, fmt=DEFAULT_FORMAT):
+    query = urlencode({"file_url": file_url, "size": size, "format": fmt, "v": content_hash})
+    return f"{get_url()}/api/method/searchitem.api.thumbnails.get_thumbnail?{query}"
+
+
+def add_thumbnail_urls(products, field="image"):
+    """
+    Set `thumbnails` on every product to `{size: url}` for its image, with a
+    single source hash lookup for the page. Products whose image is not a
+    public file of this site get None.
+    """
+    prefix = get_url()
+    file_urls = {}
+    for product in products:
+        image = product.get(field) or ""
+        if image.startswith(prefix + "/files/"):
+            file_urls[id(product)] = image[len(prefix) :]
+
+    try:
+        hashes = get_source_hashes(file_urls.values()) if file_urls else {}
+    except Exception as e:
+        trace("thumbnails.error", error=e)
+        hashes = {}
+
+    for product in products:
+        file_url = file_urls.get(id(product))
+        content_hash = hashes.get(file_url)
+        product["thumbnails"] = (
+            {str(size): get_thumbnail_url(file_url, content_hash, size) for size in THUMBNAIL_SIZES}
+            if content_hash
+            else None
+        )
+
+    return products
+
+
+def get_thumbnail_path(content_hash, size, fmt):
+    return os.path.join(get_thumbnail_dir(), f"{content_hash}_{size}.{fmt}")
+
+
+def generate_thumbnail(file_url, content_hash, size, fmt):
+    """
+    Return the path of a derivative, creating it when missing. Derivatives
+    are keyed by content hash, so a replaced file never reuses a stale one.
+    """
+    path = get_thumbnail_path(content_hash, size, fmt)
+    if os.path.exists(path):
+        return path
+
+    from PIL import Image, ImageOps
+
+    with Image.open(get_source_path(file_url)) as source:
+        # Let JPEG decode at a reduced scale instead of full resolution
+        source.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(source)
+        if fmt == "jpeg" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent requests never
+        # serve a partially written derivative
+        temp_path = f"{path}.{frappe.generate_hash(length=8)}.tmp"
+        image.save(temp_path, THUMBNAIL_FORMATS[fmt][0], quality=THUMBNAIL_QUALITY)
+        os.replace(temp_path, path)
+
+    return path
+
+
+@frappe.whitelist(methods=["GET"])
+def get_thumbnail(file_url, size=THUMBNAIL_SIZES[0], format=DEFAULT_FORMAT, v=None):
+    """
+    Serve a resized derivative of a public image file
+
+    `size` must be one of THUMBNAIL_SIZES and `format` "webp" or "jpeg".
+    URLs from API responses carry the content hash as `v`, so those
+    responses are cached as immutable; any other `v` gets a short max-age.
+    """
+    size = cint(size)
+    if size not in THUMBNAIL_SIZES:
+        frappe.throw(_("Unsupported thumbnail size: {0}").format(size))
+    if format not in THUMBNAIL_FORMATS:
+        frappe.throw(_("Unsupported thumbnail format: {0}").format(format))
+
+    content_hash = get_source_hashes([file_url]).get(file_url)
+    if not content_hash:
+        frappe.throw(_("Image not found"), frappe.DoesNotExistError)
+
+    path = generate_thumbnail(file_url, content_hash, size, format)
+    with open(path, "rb") as f:
+        response = Response(f.read(), mimetype=THUMBNAIL_FORMATS[format][1])
+
+    if v == content_hash:
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response.headers["Cache-Control"] = "public, max-age=60"
+    response.headers["ETag"] = f'"{content_hash}-{size}-{format}"'
+    return response
+
+
+def pregenerate_thumbnails(file_urls=None):
+    """
+    Generate every size and format for `file_urls`, or for the images of
+    all active stock items when none are given
+    """
+    if file_urls is None:
+        file_urls = frappe.get_all(
+            "Item",
+            filters={"disabled": 0, "is_stock_item": 1, "image": ["like", "/files/%"]},
+            pluck="image",
+        )
+
+    for file_url, content_hash in get_source_hashes(file_urls).items():
+        if not content_hash:
+            continue
+        for size in THUMBNAIL_SIZES:
+            for fmt in THUMBNAIL_FORMATS:
+                try:
+                    generate_thumbnail(file_url, content_hash, size, fmt)
+                except Exception as e:
+                    frappe.log_error(
+                        f"Searchitem Thumbnail Error for '{file_url}': {str(e)}", "Searchitem API"
+                    )
+                    break
+
+
+@frappe.whitelist(methods=["POST"])
+def queue_thumbnail_generation():
+    """
+    Pre-generate thumbnails for every item image in a background job
+    """
+    frappe.only_for("System Manager")
+    frappe.enqueue(
+        "searchitem.api.thumbnails.pregenerate_thumbnails",
+        queue="long",
+        job_id="searchitem_pregenerate_thumbnails",
+        deduplicate=True,
+    )
+
+
+def on_file_change(doc, method=None, *args, **kwargs):
+    """
+    doc_events handler for File save and delete; with
+    `searchitem_pregenerate_thumbnails` set, derivatives of saved public
+    files are generated in the background
+    """
+    try:
+        if not doc.file_url:
+            return
+        frappe.cache().hdel(SOURCE_HASH_KEY, doc.file_url)
+        _source_hash_lru.delete(doc.file_url)
+
+        if (
+            method == "on_update"
+            and frappe.conf.get("searchitem_pregenerate_thumbnails")
+            and get_source_path(doc.file_url)
+        ):
+            frappe.enqueue(
+                "searchitem.api.thumbnails.pregenerate_thumbnails",
+                queue="long",
+                file_urls=[doc.file_url],
+                enqueue_after_commit=True,
+            )
+    except Exception as e:
+        frappe.log_error(f"Searchitem Thumbnail Error: {str(e)}", "Searchitem API")
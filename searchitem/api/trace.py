@@ -0,0 +1,38 @@
+# Search item tracing
+import random
+
+import frappe
+
+
+def _sampled():
+    """
+    Decide once per request whether its events are recorded, so that a
+    sampled request keeps all of its events together
+    """
+    sampled = getattr(frappe.local, "searchitem_trace_sampled", None)
+    if sampled is None:
+        rate = frappe.conf.get("searchitem_trace_sample_rate") if frappe.conf else None
+        sampled = bool(rate) and random.random() < float(rate)
+        frappe.local.searchitem_trace_sampled = sampled
+    return sampled
+
+
+def trace(event, **fields):
+    """
+    Record a structured debug event.
+
+    Does no formatting at all unless tracing is enabled with
+    `searchitem_trace_sample_rate` (0-1) in site config and the current
+    request is sampled. Pass callables for values that are costly to
+    compute; they are only called for sampled requests.
+    """
+    if not _sampled():
+        return
+
+    try:
+        record = {"event": event}
+        for key, value in fields.items():
+            record[key] = value() if callable(value) else value
+        frappe.logger("searchitem", allow_site=True).info(record)
+    except Exception:
+        pass
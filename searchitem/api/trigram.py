@@ -0,0 +1,208 @@
+# Search item trigram index
+import threading
+from array import array
+
+import frappe
+
+# Redis list of item names changed since the index generation was started
+CHANGES_KEY = "searchitem_trigram_changes"
+# Bumped whenever the change list is reset; workers rebuild on mismatch
+GENERATION_KEY = "searchitem_trigram_generation"
+# Change list length after which the list is reset and workers rebuild
+MAX_PENDING_CHANGES = 5000
+# Upper bound on candidate names returned for a single query
+MAX_CANDIDATES = 1000
+
+INDEXED_FIELDS = ("item_code", "item_name")
+
+
+def trigrams(text):
+    """Return the distinct trigrams of an already casefolded string"""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Substring index over item_code and item_name of active stock items.
+
+    Every indexed version of an item gets a new integer id, so posting
+    lists are append-only `array('I')` buffers that stay sorted. Updates
+    tombstone the old id instead of editing the postings, and the index
+    compacts itself once tombstones pile up.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.names = []
+        self.texts = {field: [] for field in INDEXED_FIELDS}
+        self.ids = {}
+        self.postings = {field: {} for field in INDEXED_FIELDS}
+        self.tombstones = 0
+        self.generation = None
+        self.applied_changes = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, name, item_code, item_name):
+        self.remove(name)
+        doc_id = len(self.names)
+        self.names.append(name)
+        self.ids[name] = doc_id
+        for field, value in (("item_code", item_code), ("item_name", item_name)):
+            text = (value or "").casefold()
+            self.texts[field].append(text)
+            postings = self.postings[field]
+            for gram in trigrams(text):
+                postings.setdefault(gram, array("I")).append(doc_id)
+
+    def remove(self, name):
+        doc_id = self.ids.pop(name, None)
+        if doc_id is not None:
+            self.names[doc_id] = None
+            self.tombstones += 1
+
+    def search(self, query, field, limit=MAX_CANDIDATES):
+        """
+        Return names whose `field` contains `query`, newest first, or None
+        when the query is too short to use the index
+        """
+        needle = (query or "").casefold()
+        grams = trigrams(needle)
+        if not grams:
+            return None
+
+        postings = self.postings[field]
+        lists = [postings.get(gram) for gram in grams]
+        if not all(lists):
+            return []
+
+        texts = self.texts[field]
+        matches = []
+        for doc_id in reversed(min(lists, key=len)):
+            name = self.names[doc_id]
+            if name is not None and needle in texts[doc_id]:
+                matches.append(name)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def needs_compaction(self):
+        return self.tombstones > 1000 and self.tombstones > len(self.ids)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def is_enabled():
+    return bool(frappe.conf.get("searchitem_trigram_index"))
+
+
+def build_index():
+    """Build a fresh index for the current site from tabItem"""
+    index = TrigramIndex()
+    index.generation = frappe.cache().get_value(GENERATION_KEY)
+    index.applied_changes = frappe.cache().llen(CHANGES_KEY)
+    for name, item_code, item_name in frappe.get_all(
+        "Item",
+        fields=["name", "item_code", "item_name"],
+        filters={"disabled": 0, "is_stock_item": 1},
+        order_by="modified asc",
+        as_list=True,
+    ):
+        index.add(name, item_code, item_name)
+    return index
+
+
+def get_index():
+    """
+    Return the current site's index, building it on first use and applying
+    changes other workers have published since the last call
+    """
+    site = frappe.local.site
+    index = _indexes.get(site)
+    generation = frappe.cache().get_value(GENERATION_KEY)
+
+    if index is None or index.generation != generation or index.needs_compaction():
+        with _indexes_lock:
+            index = _indexes.get(site)
+            if index is None or index.generation != generation or index.needs_compaction():
+                index = build_index()
+                _indexes[site] = index
+        return index
+
+    pending = frappe.cache().llen(CHANGES_KEY)
+    if pending > index.applied_changes:
+        with index.lock:
+            if pending > index.applied_changes:
+                changed = frappe.cache().lrange(CHANGES_KEY, index.applied_changes, pending - 1)
+                _apply_changes(index, {frappe.safe_decode(name) for name in changed})
+                index.applied_changes = pending
+
+    return index
+
+
+def _apply_changes(index, names):
+    if not names:
+        return
+
+    for name in names:
+        index.remove(name)
+
+    for name, item_code, item_name in frappe.get_all(
+        "Item",
+        fields=["name", "item_code", "item_name"],
+        filters={"name": ["in", list(names)], "disabled": 0, "is_stock_item": 1},
+        order_by="modified asc",
+        as_list=True,
+    ):
+        index.add(name, item_code, item_name)
+
+
+def find_substring_candidates(query, field):
+    """
+    Return names of active stock items whose `field` contains `query`, or
+    None when the index is disabled or cannot serve the query and the
+    caller should fall back to `LIKE '%query%'`
+    """
+    if not is_enabled() or field not in INDEXED_FIELDS:
+        return None
+
+    try:
+        return get_index().search(query, field)
+    except Exception as e:
+        frappe.log_error(f"Searchitem Trigram Index Error: {str(e)}", "Searchitem API")
+        return None
+
+
+def publish_changes(names):
+    """Append changed Item names to the feed every worker's index follows"""
+    try:
+        cache = frappe.cache()
+        if cache.llen(CHANGES_KEY) >= MAX_PENDING_CHANGES:
+            cache.delete_value(CHANGES_KEY)
+            cache.set_value(GENERATION_KEY, frappe.generate_hash(length=10))
+            return
+
+        for name in names:
+            cache.rpush(CHANGES_KEY, name)
+    except Exception as e:
+        frappe.log_error(f"Searchitem Trigram Index Error: {str(e)}", "Searchitem API")
+
+
+def on_item_change(doc, method=None, *args, **kwargs):
+    """
+    doc_events handler publishing changed Items to every worker's index
+
+    Changes are published after the transaction commits; published earlier,
+    another worker could re-read the old row and mark the change applied.
+    """
+    try:
+        names = [doc.name]
+        if method == "after_rename" and args:
+            names.append(args[0])
+
+        frappe.db.after_commit.add(lambda: publish_changes(names))
+    except Exception as e:
+        frappe.log_error(f"Searchitem Trigram Index Error: {str(e)}", "Searchitem API")
@@ -0,0 +1,173 @@
+# Search item typeahead API
+import threading
+from bisect import bisect_left
+
+import frappe
+from frappe.utils import cint
+
+from searchitem.api.products import resolve_image_urls
+from searchitem.api.trigram import CHANGES_KEY, GENERATION_KEY
+
+# Upper bound on suggestions returned by a single call
+MAX_SUGGESTIONS = 20
+
+
+class PrefixIndex:
+    """
+    Sorted, casefolded item_code and item_name keys of active stock items,
+    answering prefix queries with a binary search.
+
+    Keys and names are kept in parallel lists rather than tuples to keep
+    the per-item overhead small on large catalogs. The raw `image` of each
+    item is kept with its code and name so suggestions can show it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = {}
+        self.keys = {"item_code": [], "item_name": []}
+        self.names = {"item_code": [], "item_name": []}
+        self.generation = None
+        self.applied_changes = 0
+
+    def load(self, rows):
+        """Bulk load `(name, item_code, item_name, image)` rows into an empty index"""
+        for field, position in (("item_code", 1), ("item_name", 2)):
+            pairs = sorted(((row[position] or "").casefold(), row[0]) for row in rows)
+            self.keys[field] = [key for key, _name in pairs]
+            self.names[field] = [name for _key, name in pairs]
+        self.items = {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+    def add(self, name, item_code, item_name, image=None):
+        self.remove(name)
+        self.items[name] = (item_code, item_name, image)
+        for field, value in (("item_code", item_code), ("item_name", item_name)):
+            key = (value or "").casefold()
+            position = bisect_left(self.keys[field], key)
+            self.keys[field].insert(position, key)
+            self.names[field].insert(position, name)
+
+    def remove(self, name):
+        values = self.items.pop(name, None)
+        if values is None:
+            return
+
+        for field, value in zip(("item_code", "item_name"), values[:2], strict=True):
+            keys, names = self.keys[field], self.names[field]
+            key = (value or "").casefold()
+            position = bisect_left(keys, key)
+            while position < len(keys) and keys[position] == key:
+                if names[position] == name:
+                    del keys[position]
+                    del names[position]
+                    break
+                position += 1
+
+    def search(self, prefix, limit):
+        """Return up to `limit` item_code matches followed by item_name matches"""
+        prefix = prefix.casefold()
+        results = []
+        seen = set()
+        for field in ("item_code", "item_name"):
+            keys, names = self.keys[field], self.names[field]
+            position = bisect_left(keys, prefix)
+            while position < len(keys) and len(results) < limit and keys[position].startswith(prefix):
+                name = names[position]
+                if name not in seen:
+                    seen.add(name)
+                    item_code, item_name, image = self.items[name]
+                    results.append(
+                        {
+                            "name": name,
+                            "item_code": item_code,
+                            "item_name": item_name,
+                            "image": image,
+                            "match": field,
+                        }
+                    )
+                position += 1
+        return results
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def build_index():
+    """Build a fresh prefix index for the current site from tabItem"""
+    index = PrefixIndex()
+    index.generation = frappe.cache().get_value(GENERATION_KEY)
+    index.applied_changes = frappe.cache().llen(CHANGES_KEY)
+    index.load(
+        frappe.get_all(
+            "Item",
+            fields=["name", "item_code", "item_name", "image"],
+            filters={"disabled": 0, "is_stock_item": 1},
+            as_list=True,
+        )
+    )
+    return index
+
+
+def get_index():
+    """
+    Return the current site's prefix index, building it on first use and
+    applying the Item changes published by the trigram index hooks
+    """
+    site = frappe.local.site
+    index = _indexes.get(site)
+    generation = frappe.cache().get_value(GENERATION_KEY)
+
+    if index is None or index.generation != generation:
+        with _indexes_lock:
+            index = _indexes.get(site)
+            if index is None or index.generation != generation:
+                index = build_index()
+                _indexes[site] = index
+        return index
+
+    pending = frappe.cache().llen(CHANGES_KEY)
+    if pending > index.applied_changes:
+        changed = {
+            frappe.safe_decode(name)
+            for name in frappe.cache().lrange(CHANGES_KEY, index.applied_changes, pending - 1)
+        }
+        rows = frappe.get_all(
+            "Item",
+            fields=["name", "item_code", "item_name", "image"],
+            filters={"name": ["in", list(changed)], "disabled": 0, "is_stock_item": 1},
+            as_list=True,
+        )
+        with index.lock:
+            if pending > index.applied_changes:
+                for name in changed:
+                    index.remove(name)
+                for name, item_code, item_name, image in rows:
+                    index.add(name, item_code, item_name, image)
+                index.applied_changes = pending
+
+    return index
+
+
+@frappe.whitelist()
+def suggest_products(query, limit=10):
+    """
+    Typeahead suggestions for item_code and item_name prefixes
+
+    Answered from the in-memory prefix index without touching the database
+    once the index is warm. Images are resolved to safe URLs and thumbnails
+    like search results, from the shared file caches.
+    """
+    try:
+        if not query or not query.strip():
+            return []
+
+        limit = min(max(cint(limit), 1), MAX_SUGGESTIONS)
+        index = get_index()
+        with index.lock:
+            suggestions = index.search(query.strip(), limit)
+        return resolve_image_urls(suggestions)
+
+    except Exception as e:
+        frappe.log_error(f"Searchitem Typeahead Error: {str(e)}", "Searchitem API")
+        return []
@@ -0,0 +1,6 @@
+# Search item benchmarks
+#
+# Run against a site backed by a local MariaDB, for example:
+#   bench --site bench.local execute searchitem.benchmarks.catalog.generate_catalog --kwargs "{'size': 50000}"
+#   bench --site bench.local execute searchitem.benchmarks.run.run --kwargs "{'output': '/tmp/searchitem-bench.json'}"
+#   bench --site bench.local execute searchitem.benchmarks.catalog.drop_catalog
@@ -0,0 +1,147 @@
+# Synthetic catalog generator for searchitem benchmarks
+import random
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+# Every generated record is prefixed so it can be dropped afterwards
+PREFIX = "SIBENCH"
+WAREHOUSES = [f"{PREFIX} Stores {i} - B" for i in range(1, 4)]
+NAME_WORDS = [
+    "Steel", "Bolt", "Washer", "Cable", "Pipe", "Valve", "Filter", "Pump", "Bearing", "Gasket",
+    "น้ำดื่ม", "ข้าวสาร", "น้ำมันพืช", "สบู่", "ยาสีฟัน", "กระดาษทิชชู่", "ผงซักฟอก", "นมสด",
+]
+# Image field styles seen on real sites, see get_safe_image_url
+IMAGE_STYLES = ["none", "files", "private", "http", "file_doc", "bare", "backslash"]
+
+
+def item_code(i):
+    return f"{PREFIX}-{i:07d}"
+
+
+def item_barcode(i):
+    return f"885{i:010d}"
+
+
+def _image_for(i, style):
+    if style == "none":
+        return None
+    if style == "files":
+        return f"/files/{PREFIX.lower()}-{i}.jpg"
+    if style == "private":
+        return f"/private/files/{PREFIX.lower()}-{i}.jpg"
+    if style == "http":
+        return f"https://cdn.example.com/{PREFIX.lower()}-{i}.jpg"
+    if style == "file_doc":
+        return f"{PREFIX}-FILE-{i:07d}"
+    if style == "bare":
+        return f"{PREFIX.lower()}-{i}.jpg"
+    return f"files\\{PREFIX.lower()}-{i}.jpg"
+
+
+def generate_catalog(size=10000, barcode_ratio=0.8, disabled_ratio=0.02, seed=42):
+    """
+    Insert `size` synthetic Items with Item Barcodes, Bins and Files.
+
+    Rows are bulk inserted without document validation, so this is only
+    meant for throwaway benchmark sites.
+    """
+    size = int(size)
+    rng = random.Random(seed)
+    now = now_datetime()
+    common = {"owner": "Administrator", "modified_by": "Administrator", "docstatus": 0}
+
+    items, barcodes, bins, files = [], [], [], []
+    for i in range(size):
+        code = item_code(i)
+        style = IMAGE_STYLES[i % len(IMAGE_STYLES)]
+        modified = add_to_date(now, seconds=-i)
+        items.append(
+            {
+                **common,
+                "name": code,
+                "item_code": code,
+                "item_name": " ".join(rng.sample(NAME_WORDS, 3)) + f" {i}",
+                "description": f"Synthetic benchmark item {i}",
+                "item_group": "All Item Groups",
+                "stock_uom": "Nos",
+                "standard_rate": round(rng.uniform(1, 5000), 2),
+                "image": _image_for(i, style),
+                "is_stock_item": 1,
+                "disabled": 1 if rng.random() < disabled_ratio else 0,
+                "creation": modified,
+                "modified": modified,
+            }
+        )
+
+        if rng.random() < barcode_ratio:
+            barcodes.append(
+                {
+                    **common,
+                    "name": f"{PREFIX}-BC-{i:07d}",
+                    "parent": code,
+                    "parenttype": "Item",
+                    "parentfield": "barcodes",
+                    "idx": 1,
+                    "barcode": item_barcode(i),
+                    "barcode_type": "EAN",
+                    "creation": modified,
+                    "modified": modified,
+                }
+            )
+
+        for warehouse in rng.sample(WAREHOUSES, rng.randint(1, len(WAREHOUSES))):
+            bins.append(
+                {
+                    **common,
+                    "name": f"{PREFIX}-BIN-{i:07d}-{WAREHOUSES.index(warehouse)}",
+                    "item_code": code,
+                    "warehouse": warehouse,
+                    "stock_uom": "Nos",
+                    "actual_qty": rng.randint(0, 500),
+                    "creation": modified,
+                    "modified": modified,
+                }
+            )
+
+        if style == "file_doc":
+            files.append(
+                {
+                    **common,
+                    "name": f"{PREFIX}-FILE-{i:07d}",
+                    "file_name": f"{PREFIX.lower()}-{i}.jpg",
+                    "file_url": f"/files/{PREFIX.lower()}-{i}.jpg",
+                    "attached_to_doctype": "Item",
+                    "attached_to_name": code,
+                    "is_private": 0,
+                    "is_folder": 0,
+                    "creation": modified,
+                    "modified": modified,
+                }
+            )
+
+    for doctype, rows in (("Item", items), ("Item Barcode", barcodes), ("Bin", bins), ("File", files)):
+        if rows:
+            fields = list(rows[0])
+            frappe.db.bulk_insert(doctype, fields, [[row[f] for f in fields] for row in rows])
+
+    frappe.db.commit()
+
+    from searchitem.benchmarks.run import reset_caches
+
+    reset_caches()
+    return {"items": len(items), "barcodes": len(barcodes), "bins": len(bins), "files": len(files)}
+
+
+def drop_catalog():
+    """Delete every record created by `generate_catalog`"""
+    like = f"{PREFIX}-%"
+    frappe.db.sql("delete from `tabItem Barcode` where name like %s", like)
+    frappe.db.sql("delete from `tabBin` where name like %s", like)
+    frappe.db.sql("delete from `tabFile` where name like %s", like)
+    frappe.db.sql("delete from `tabItem` where name like %s", like)
+    frappe.db.commit()
+
+    from searchitem.benchmarks.run import reset_caches
+
+    reset_caches()
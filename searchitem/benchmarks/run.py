@@ -0,0 +1,197 @@
+# Endpoint micro-benchmarks for searchitem.api.products
+import inspect
+import json
+import platform
+import subprocess
+import time
+from contextlib import contextmanager
+
+import frappe
+
+from searchitem.api import products
+from searchitem.benchmarks.catalog import PREFIX, item_barcode, item_code
+
+# Arguments for every whitelisted endpoint, per scenario. Endpoints that
+# are whitelisted but missing here are reported as skipped.
+SCENARIOS = {
+    "get_products": {
+        "first_page": lambda: {"limit": 50, "offset": 0},
+        "deep_page": lambda: {"limit": 50, "offset": 5000},
+        "keyset_first_page": lambda: {"limit": 50, "paginate": "keyset"},
+    },
+    "search_products": {
+        "hit": lambda: {"query": item_code(42)},
+        "partial": lambda: {"query": "Bolt"},
+        "miss": lambda: {"query": "no-such-product"},
+    },
+    "get_product_by_code": {
+        "hit": lambda: {"item_code": item_code(42)},
+        "partial": lambda: {"item_code": "0000042"},
+        "miss": lambda: {"item_code": "no-such-code"},
+        "hit_with_details": lambda: {"item_code": item_code(42), "include_details": 1},
+    },
+    "get_product_details": {
+        "hit": lambda: {"product_id": item_code(42)},
+        "miss": lambda: {"product_id": "no-such-item"},
+    },
+    "get_product_by_barcode": {
+        "hit": lambda: {"barcode": item_barcode(42)},
+        "miss": lambda: {"barcode": "0000000000000"},
+    },
+    "scan_products_bulk": {
+        "hit": lambda: {"codes": [item_barcode(i) for i in range(0, 1000, 10)]},
+        "miss": lambda: {"codes": [f"999{i:010d}" for i in range(100)]},
+    },
+    "search_product_unified": {
+        "barcode": lambda: {"query": item_barcode(42)},
+        "item_code_exact": lambda: {"query": item_code(42)},
+        "partial": lambda: {"query": "0000042"},
+        "miss": lambda: {"query": "9999999999999"},
+        "ranked_miss": lambda: {"query": "9999999999999", "ranked": 1},
+        "barcode_with_details": lambda: {"query": item_barcode(42), "include_details": 1},
+    },
+    "diagnose_image_issue": {
+        "hit": lambda: {"item_code": item_code(42)},
+    },
+    "test_unified_search": {
+        "miss": lambda: {"query": "9999999999999"},
+    },
+    "diagnose_search_issue": {
+        "partial": lambda: {"query": "Bolt"},
+    },
+}
+
+
+@contextmanager
+def count_queries():
+    """Count statements sent through frappe.db.sql while the block runs"""
+    counter = {"queries": 0}
+    original_sql = frappe.db.sql
+
+    def counting_sql(*args, **kwargs):
+        counter["queries"] += 1
+        return original_sql(*args, **kwargs)
+
+    frappe.db.sql = counting_sql
+    try:
+        yield counter
+    finally:
+        frappe.db.sql = original_sql
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def reset_caches():
+    """Drop searchitem's shared caches so runs start from the same state"""
+    from searchitem.api import bloom
+    from searchitem.api.cache import FILE_URL_KEY, clear_barcode_cache
+    from searchitem.api.pricing import clear_price_index
+    from searchitem.api.stock import clear_stock_summary
+    from searchitem.api.thumbnails import SOURCE_HASH_KEY
+    from searchitem.api.trigram import CHANGES_KEY, GENERATION_KEY
+
+    clear_barcode_cache()
+    frappe.cache().delete_value(FILE_URL_KEY)
+    frappe.cache().delete_value(SOURCE_HASH_KEY)
+    # Bulk inserts bypass the Item and Bin hooks, so force derived data to rebuild
+    clear_stock_summary()
+    clear_price_index()
+    frappe.cache().delete_value(CHANGES_KEY)
+    frappe.cache().set_value(GENERATION_KEY, frappe.generate_hash(length=10))
+    if bloom.is_enabled():
+        bloom.rebuild_filter()
+
+
+def whitelisted_endpoints():
+    return {
+        name: fn
+        for name, fn in inspect.getmembers(products, inspect.isfunction)
+        if fn.__module__ == products.__name__ and fn in frappe.whitelisted
+    }
+
+
+def measure(fn, kwargs, iterations, warmup):
+    for _ in range(warmup):
+        frappe.local.cache = {}
+        fn(**kwargs)
+
+    timings, queries = [], []
+    for _ in range(iterations):
+        # Each call should behave like a fresh request
+        frappe.local.cache = {}
+        with count_queries() as counter:
+            start = time.perf_counter()
+            fn(**kwargs)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(counter["queries"])
+
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "p99_ms": percentile(timings, 99),
+        "max_ms": max(timings),
+        "queries_p50": percentile(queries, 50),
+        "queries_max": max(queries),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=frappe.get_app_path("searchitem"), text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def run(iterations=200, warmup=10, only=None, output=None):
+    """
+    Benchmark every whitelisted endpoint of searchitem.api.products
+
+    `only` restricts the run to a comma separated list of endpoint names.
+    The report is returned and, when `output` is set, written there as JSON
+    so that runs from different commits can be diffed.
+    """
+    iterations, warmup = int(iterations), int(warmup)
+    selected = set(only.split(",")) if only else None
+
+    if not frappe.db.exists("Item", item_code(42)):
+        frappe.throw(f"No {PREFIX} catalog found, run searchitem.benchmarks.catalog.generate_catalog first")
+
+    reset_caches()
+    report = {
+        "revision": _git_revision(),
+        "site": frappe.local.site,
+        "python": platform.python_version(),
+        "catalog_items": frappe.db.count("Item", {"name": ["like", f"{PREFIX}-%"]}),
+        "iterations": iterations,
+        "results": {},
+        "skipped": [],
+    }
+
+    for name, fn in sorted(whitelisted_endpoints().items()):
+        if selected and name not in selected:
+            continue
+        if name not in SCENARIOS:
+            report["skipped"].append(name)
+            continue
+
+        report["results"][name] = {
+            scenario: measure(fn, make_kwargs(), iterations, warmup)
+            for scenario, make_kwargs in SCENARIOS[name].items()
+        }
+        # Benchmarks only read, but keep the transaction short
+        frappe.db.rollback()
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return report
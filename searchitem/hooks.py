@@ -26,26 +26,15 @@ add_to_apps_screen = [
 # ------------------
 
 # include js, css files in header of desk.html
-app_include_css = "/assets/searchitem/css/searchitem.css"
-app_include_js = "/assets/searchitem/js/searchitem.js"
+# app_include_css = "/assets/searchitem/css/searchitem.css"
+# app_include_js = "/assets/searchitem/js/searchitem.js"
 
 # include js, css files in header of web template
-web_include_css = "/assets/searchitem/css/searchitem.css"
-web_include_js = "/assets/searchitem/js/searchitem.js"
+# web_include_css = "/assets/searchitem/css/searchitem.css"
+# web_include_js = "/assets/searchitem/js/searchitem.js"
 
-# For development: disable JS caching by adding version parameter
-import frappe
-import time
-
-def get_js_with_version():
-    if frappe.conf.get("developer_mode"):
-        return f"/assets/searchitem/js/searchitem.js?v={int(time.time())}"
-    return "/assets/searchitem/js/searchitem.js"
-
-# Override JS includes in development mode
-if frappe.conf.get("developer_mode"):
-    app_include_js = get_js_with_version()
-    web_include_js = get_js_with_version()
+# searchitem.bundle.js and searchitem.bundle.css are built by `bench build`
+# and included by www/searchitem.html only, see include_script/include_style
 
 # include custom scss in every website theme (without file extension ".scss")
 # website_theme_scss = "searchitem/public/scss/website"
@@ -55,7 +44,7 @@ if frappe.conf.get("developer_mode"):
 # webform_include_css = {"doctype": "public/css/doctype.css"}
 
 # include js in page
-page_js = {"searchitem" : "public/js/searchitem.js"}
+# page_js = {"page" : "public/js/file.js"}
 
 # include js in doctype views
 # doctype_js = {"doctype" : "public/js/doctype.js"}
@@ -85,6 +74,9 @@ page_js = {"searchitem" : "public/js/searchitem.js"}
 # automatically create page for each record of this doctype
 # website_generators = ["Web Page"]
 
+# Serve /searchitem from the page cache with per-user bootstrap data inlined
+page_renderer = ["searchitem.page_renderers.SearchitemPage"]
+
 # Jinja
 # ----------
 
@@ -117,7 +109,7 @@ page_js = {"searchitem" : "public/js/searchitem.js"}
 # Migration
 # ------------
 # before_migrate = "searchitem.utils.before_migrate"
-# after_migrate = "searchitem.utils.after_migrate"
+after_migrate = "searchitem.api.indexes.after_migrate"
 
 # Permissions
 # ------------
@@ -135,13 +127,77 @@ page_js = {"searchitem" : "public/js/searchitem.js"}
 # ---------------
 # Hook on document methods and events
 
-# doc_events = {
-# 	"*": {
-# 		"on_update": "method",
-# 		"on_cancel": "method",
-# 		"on_trash": "method"
-#	}
-# }
+doc_events = {
+	"Item": {
+		"on_update": [
+			"searchitem.api.cache.on_item_change",
+			"searchitem.api.trigram.on_item_change",
+			"searchitem.api.bloom.on_item_change"
+		],
+		"on_trash": [
+			"searchitem.api.cache.on_item_change",
+			"searchitem.api.trigram.on_item_change"
+		],
+		"after_rename": [
+			"searchitem.api.cache.on_item_change",
+			"searchitem.api.trigram.on_item_change",
+			"searchitem.api.bloom.on_item_change"
+		]
+	},
+	"Item Barcode": {
+		"on_update": [
+			"searchitem.api.cache.on_item_barcode_change",
+			"searchitem.api.bloom.on_item_barcode_change"
+		],
+		"on_trash": "searchitem.api.cache.on_item_barcode_change"
+	},
+	"File": {
+		"on_update": [
+			"searchitem.api.cache.on_file_change",
+			"searchitem.api.thumbnails.on_file_change"
+		],
+		"on_trash": [
+			"searchitem.api.cache.on_file_change",
+			"searchitem.api.thumbnails.on_file_change"
+		]
+	},
+	"Bin": {
+		"on_update": "searchitem.api.stock.on_stock_change",
+		"on_trash": "searchitem.api.stock.on_stock_change"
+	},
+	"Stock Ledger Entry": {
+		"on_submit": "searchitem.api.stock.on_stock_change",
+		"on_cancel": "searchitem.api.stock.on_stock_change"
+	},
+	"Repost Item Valuation": {
+		"on_change": "searchitem.api.stock.on_repost_change"
+	},
+	"Item Price": {
+		"on_update": "searchitem.api.pricing.on_item_price_change",
+		"on_trash": "searchitem.api.pricing.on_item_price_change"
+	},
+	"User": {
+		"on_update": "searchitem.api.permission.on_user_change",
+		"on_trash": "searchitem.api.permission.on_user_change"
+	},
+	"User Permission": {
+		"on_update": "searchitem.api.permission.on_user_permission_change",
+		"on_trash": "searchitem.api.permission.on_user_permission_change"
+	},
+	"Role": {
+		"on_update": "searchitem.api.permission.on_role_change"
+	},
+	"Role Profile": {
+		"on_update": "searchitem.api.permission.on_role_change"
+	},
+	"Custom DocPerm": {
+		"on_update": "searchitem.api.permission.on_role_change",
+		"on_trash": "searchitem.api.permission.on_role_change"
+	}
+}
+
+# Drop cached permission snapshots on bench clear-cache
+clear_cache = "searchitem.api.permission.clear_permission_cache"
 
 # Scheduled Tasks
 # ---------------
@@ -164,6 +220,14 @@ page_js = {"searchitem" : "public/js/searchitem.js"}
 # 	]
 # }
 
+scheduler_events = {
+	"daily_long": [
+		"searchitem.api.bloom.scheduled_rebuild",
+		"searchitem.api.stock.clear_stock_summary",
+		"searchitem.api.pricing.clear_price_index"
+	]
+}
+
 # Testing
 # -------
 
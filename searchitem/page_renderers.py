@@ -0,0 +1,29 @@
+# Search item page renderers
+import frappe
+from frappe.website.page_renderers.template_page import TemplatePage
+
+from searchitem.api.bootstrap import BOOTSTRAP_PLACEHOLDER, get_bootstrap, render_bootstrap_script
+from searchitem.api.permission import get_permission_snapshot
+
+
+class SearchitemPage(TemplatePage):
+    """
+    Serve /searchitem from the website page cache and inline the per-user
+    bootstrap blob afterwards, the same way frappe inserts the CSRF token.
+
+    The template holds no per-user data, so one cached shell serves every
+    user; the permission check runs here since get_context is skipped on
+    cache hits.
+    """
+
+    def can_render(self):
+        return self.path == "searchitem" and super().can_render()
+
+    def render(self):
+        if not get_permission_snapshot()["can_read_items"]:
+            raise frappe.PermissionError(frappe._("Not permitted to view searchitem"))
+
+        html = self.get_html()
+        html = self.add_csrf_token(html)
+        html = html.replace(BOOTSTRAP_PLACEHOLDER, render_bootstrap_script(get_bootstrap()), 1)
+        return self.build_response(html)
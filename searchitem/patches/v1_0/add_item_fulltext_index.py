@@ -0,0 +1,6 @@
+from searchitem.api.fulltext import create_fulltext_index
+
+
+def execute():
+    """Add the FULLTEXT index used by the relevance-ranked search mode"""
+    create_fulltext_index()
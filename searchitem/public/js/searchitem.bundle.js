@@ -5,24 +5,77 @@ frappe.provide("searchitem");
 // Debug: Check if frappe is available
 console.log("Searchitem JS loaded. Frappe available:", typeof frappe !== "undefined");
 
-searchitem = {
+window.searchitem = {
 	searchKeyword: "",
 
+	// Typeahead state: debounce delay, in-flight cap and request sequencing
+	typeahead: {
+		delay: 150,
+		minLength: 2,
+		limit: 10,
+		maxInFlight: 2,
+		inFlight: 0,
+		seq: 0,
+		renderedSeq: 0,
+		pendingQuery: null,
+		timer: null,
+	},
+
+	// Per-user data inlined into the page by the server, see searchitem.api.bootstrap
+	bootstrap: {},
+
 	// Initialize the searchitem app
 	init: function () {
+		this.bootstrap = window.searchitem_bootstrap || {};
 		this.bindEvents();
 		this.setupSearch();
 		this.loadProducts();
+		this.renderFeaturedProducts(this.bootstrap.featured_products);
 		this.currentProductId = null;
 	},
 
+	// Render featured items from the bootstrap data, no request needed
+	renderFeaturedProducts: function (products) {
+		const container = $("#featured-products-list");
+		container.empty();
+
+		if (!products || products.length === 0) {
+			$("#featured-products").hide();
+			return;
+		}
+
+		products.forEach((product) => {
+			const safeImageUrl = this.getThumbnailUrl(product, "96");
+			const imageHtml = safeImageUrl
+				? `<img src="${safeImageUrl}" 
+					   alt="${product.item_name}" 
+					   class="mr-3"
+					   style="width: 40px; height: 40px; object-fit: cover; border-radius: 4px;">`
+				: "";
+
+			container.append(`
+                <div class="suggestion-item" data-product-id="${product.name}">
+                    <div class="d-flex align-items-center">
+                        ${imageHtml}
+                        <div class="flex-grow-1">
+                            <div class="font-weight-bold">${product.item_name}</div>
+                            <div class="text-muted small">${product.item_code || ""}</div>
+                        </div>
+                        <div class="small">${this.formatPrice(product.rate)}</div>
+                    </div>
+                </div>
+            `);
+		});
+
+		$("#featured-products").show();
+	},
+
 	// Bind event listeners
 	bindEvents: function () {
-		// Search input events - only update search keyword, no automatic search
+		// Search input events - update search keyword and fetch typeahead suggestions
 		$(document).on("input", "#product-search", function () {
 			searchitem.searchKeyword = $(this).val();
-			// Hide suggestions when typing (no automatic search)
-			searchitem.hideSuggestions();
+			searchitem.handleSearchInput(searchitem.searchKeyword);
 		});
 
 		// Enter key for item code search
@@ -135,22 +188,82 @@ searchitem = {
 		});
 	},
 
-	// Setup search (simplified - no debouncing needed)
+	// Setup search
 	setupSearch: function () {
-		// No longer needed for automatic search
+		this.cancelSuggestions();
 	},
 
-	// Handle search input (simplified - no automatic search)
+	// Handle search input - debounced prefix suggestions
 	handleSearchInput: function (query) {
-		// This function is no longer used for automatic search
-		// Search only happens on Enter key or button click
-		console.log("Search input changed to:", query);
+		const state = this.typeahead;
+		clearTimeout(state.timer);
+
+		query = (query || "").trim();
+		if (query.length < state.minLength) {
+			this.cancelSuggestions();
+			this.hideSuggestions();
+			return;
+		}
+
+		state.timer = setTimeout(() => this.fetchSuggestions(query), state.delay);
+	},
+
+	// Fetch typeahead suggestions, keeping at most maxInFlight requests open
+	fetchSuggestions: function (query) {
+		const state = this.typeahead;
+
+		if (state.inFlight >= state.maxInFlight) {
+			// Only the latest query is worth sending once a slot frees up
+			state.pendingQuery = query;
+			return;
+		}
+
+		const seq = ++state.seq;
+		state.inFlight++;
+
+		frappe.call({
+			method: "searchitem.api.typeahead.suggest_products",
+			args: {
+				query: query,
+				limit: state.limit,
+			},
+			callback: function (r) {
+				// Drop responses older than what is already shown or no longer typed
+				if (seq <= state.renderedSeq || $("#product-search").val().trim() !== query) {
+					return;
+				}
+				state.renderedSeq = seq;
+				if (r.message && r.message.length > 0) {
+					searchitem.showSearchSuggestions(r.message);
+				} else {
+					searchitem.hideSuggestions();
+				}
+			},
+			always: function () {
+				state.inFlight--;
+				if (state.pendingQuery) {
+					const pending = state.pendingQuery;
+					state.pendingQuery = null;
+					searchitem.fetchSuggestions(pending);
+				}
+			},
+		});
+	},
+
+	// Cancel pending suggestions and ignore responses still in flight
+	cancelSuggestions: function () {
+		const state = this.typeahead;
+		clearTimeout(state.timer);
+		state.pendingQuery = null;
+		state.renderedSeq = state.seq;
 	},
 
 	// Handle Enter key press
 	handleEnterKey: function (query) {
 		if (!query.trim()) return;
 
+		this.cancelSuggestions();
+
 		// Use unified search for Enter key as well
 		this.performUnifiedSearchDirect(query.trim());
 	},
@@ -165,12 +278,13 @@ searchitem = {
 			method: "searchitem.api.products.get_product_by_code",
 			args: {
 				item_code: itemCode,
+				include_details: 1,
 			},
 			callback: function (r) {
 				searchitem.hideLoading();
 				if (r.message && r.message.length > 0) {
 					// Show the first product details directly
-					searchitem.showProductDetails(r.message[0].name);
+					searchitem.showFirstProduct(r.message);
 				} else {
 					searchitem.showNoProducts();
 					frappe.show_alert(__("No product found with code: {0}", [itemCode]), 3);
@@ -214,13 +328,14 @@ searchitem = {
 			method: "searchitem.api.products.search_product_unified",
 			args: {
 				query: query,
+				include_details: 1,
 			},
 			callback: function (r) {
 				searchitem.hideLoading();
 				if (r.message && r.message.length > 0) {
 					console.log("Direct unified search results:", r.message);
 					// Show the first product details directly
-					searchitem.showProductDetails(r.message[0].name);
+					searchitem.showFirstProduct(r.message);
 				} else {
 					searchitem.showNoProducts();
 					frappe.show_alert(__("No product found for: {0}", [query]), 3);
@@ -268,7 +383,7 @@ searchitem = {
 				? `<span class="badge badge-info badge-sm ml-2">${product.search_method}</span>`
 				: "";
 
-			const safeImageUrl = this.getSafeImageUrl(product.image);
+			const safeImageUrl = this.getThumbnailUrl(product, "96");
 			const imageHtml = safeImageUrl
 				? `<img src="${safeImageUrl}" 
 					   alt="${product.item_name}" 
@@ -299,6 +414,15 @@ searchitem = {
 		this.hideSearchLoading();
 	},
 
+	// Resized WebP derivative of the product image when the server sent
+	// one, the original image otherwise
+	getThumbnailUrl: function (product, size) {
+		if (product.thumbnails && product.thumbnails[size]) {
+			return product.thumbnails[size];
+		}
+		return this.getSafeImageUrl(product.image);
+	},
+
 	// Get safe image URL
 	getSafeImageUrl: function (imageUrl) {
 		if (!imageUrl || imageUrl.trim() === "") {
@@ -379,6 +503,20 @@ searchitem = {
 		return frappe.format(price, { fieldtype: "Currency" });
 	},
 
+	// Show the first search result, using the embedded details when the
+	// server sent them so no second request is needed
+	showFirstProduct: function (products) {
+		const product = products[0];
+		if (product.details) {
+			this.currentProductId = product.name;
+			this.renderProductDetail(product.details);
+			$("#product-detail").show();
+			return;
+		}
+
+		this.showProductDetails(product.name);
+	},
+
 	// Show product details on page
 	showProductDetails: function (productId) {
 		this.currentProductId = productId;
@@ -408,7 +546,7 @@ searchitem = {
 	renderProductDetail: function (product) {
 		console.log("renderProductDetail: ", product);
 		const detailContainer = $("#product-detail .product-card");
-		const price = this.formatPrice(product.standard_rate);
+		const price = this.formatPrice(product.rate ?? product.standard_rate);
 		const imageUrl = this.getSafeImageUrl(product.image);
 		const defaultImage = "/assets/searchitem/images/default-product.png";
 
@@ -418,7 +556,7 @@ searchitem = {
 
 		const safeImageUrl = this.getSafeImageUrl(product.image);
 		const imageHtml = safeImageUrl
-			? `<img src="${safeImageUrl}" 
+			? `<img src="${this.getThumbnailUrl(product, "800")}" 
 				   alt="${product.item_name}" 
 				   class="product-detail-image"
 				   onclick="searchitem.showImageModal('${safeImageUrl}', '${product.item_name}', '${product.item_code}')">`
@@ -616,6 +754,7 @@ searchitem = {
 	clearSearch: function () {
 		$("#product-search").val("").focus();
 		this.searchKeyword = "";
+		this.cancelSuggestions();
 		this.hideSuggestions();
 		$("#product-detail").hide();
 		$("#no-products").hide();
@@ -632,6 +771,7 @@ searchitem = {
 		}
 
 		// Use direct unified search for barcode scanning
+		this.cancelSuggestions();
 		this.performUnifiedSearchDirect(this.searchKeyword.trim());
 	},
 };
@@ -23,7 +23,7 @@ def get_searchitem_products():
         products = frappe.get_all(
             "Item",
             filters={"show_in_searchitem": 1, "disabled": 0},
-            fields=["name", "item_name", "item_code", "image", "description"],
+            fields=["name", "item_name", "item_code", "image", "description", "standard_rate", "stock_uom"],
             limit=20
         )
         return products
@@ -1,15 +1,12 @@
-import frappe
-
 def get_context(context):
 	"""
 	Get context for searchitem page
+
+	The rendered page is a shell shared by every user and cached by the
+	website page cache; per-user data is inlined by
+	searchitem.page_renderers.SearchitemPage.
 	"""
 	context.title = "Search item"
 	context.show_sidebar = False
-	context.no_cache = True
-	
-	# Ensure user has permission to view searchitem
-	if not frappe.has_permission("Item", "read"):
-		frappe.throw("Not permitted to view searchitem", frappe.PermissionError)
 	
 	return context